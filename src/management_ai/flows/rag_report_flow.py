@@ -3,6 +3,8 @@ from prefect import flow, task
 import sys
 import os
 import asyncio
+import heapq
+from operator import attrgetter
 
 # Add the parent directory to the path so we can import from management_ai
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -20,8 +22,8 @@ def get_documents(document_query):
         indexes=C.ALL_INDEXES,
         top_k=10
     ))
-    all_docs.sort(key=lambda x: x.search_score, reverse=True)
-    return all_docs[:15]
+    # Only the best 15 are kept, so select them without sorting everything
+    return heapq.nlargest(15, all_docs, key=attrgetter("search_score"))
 
 @flow(name="RAG Report Flow", timeout_seconds=3600)
 def rag_report_flow(
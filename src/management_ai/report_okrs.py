@@ -1,6 +1,7 @@
 
 
 from datetime import datetime, timedelta
+from operator import attrgetter
 from typing import Annotated, Any, List
 
 from prefect_data_getters.stores.documents import AIDocument
@@ -102,44 +103,56 @@ def get_documents(state: AgentState):
     llm_reduction = True
     jiras, slabs, slacks, emails = [],[],[],[]
 
-    for qr in query_result["search_queries"]:
-        jiras += asyncio.run(searcher.search(
-            query=qr,
-            top_k=20,
-            keywords=None,
-            from_date=datetime.now() - timedelta(weeks=4),
-            indexes=['jira_issues'],
-            metadata_filter={"project_key": okr.team},
-            run_lm_reduction=llm_reduction
-        ))
-
-        slabs += asyncio.run(searcher.search(
-            query=qr,
-            top_k=5,
-            keywords=None, #query_result.get("keywords", None),
-            # from_date=datetime.now() - timedelta(weeks=2),
-            indexes=['slab_documents'],
-            run_lm_reduction=llm_reduction
-        ))
-        emails += asyncio.run(searcher.search(
-            query=qr,
-            top_k=10,
-            keywords=None,
-            from_date=datetime.now() - timedelta(weeks=4),
-            indexes=['email_messages'],
-            run_lm_reduction=llm_reduction
-        ))
-        slacks += asyncio.run(searcher.search(
-            query=qr,
-            top_k=10,
-            keywords=None,
-            # from_date=datetime.now() - timedelta(weeks=4),
-            indexes=['slack_messages'],
-            run_lm_reduction=llm_reduction
-        )) 
+    async def search_query(qr):
+        return await asyncio.gather(
+            searcher.search(
+                query=qr,
+                top_k=20,
+                keywords=None,
+                from_date=datetime.now() - timedelta(weeks=4),
+                indexes=['jira_issues'],
+                metadata_filter={"project_key": okr.team},
+                run_lm_reduction=llm_reduction
+            ),
+            searcher.search(
+                query=qr,
+                top_k=5,
+                keywords=None, #query_result.get("keywords", None),
+                # from_date=datetime.now() - timedelta(weeks=2),
+                indexes=['slab_documents'],
+                run_lm_reduction=llm_reduction
+            ),
+            searcher.search(
+                query=qr,
+                top_k=10,
+                keywords=None,
+                from_date=datetime.now() - timedelta(weeks=4),
+                indexes=['email_messages'],
+                run_lm_reduction=llm_reduction
+            ),
+            searcher.search(
+                query=qr,
+                top_k=10,
+                keywords=None,
+                # from_date=datetime.now() - timedelta(weeks=4),
+                indexes=['slack_messages'],
+                run_lm_reduction=llm_reduction
+            ),
+        )
+
+    async def search_all():
+        # The searches are independent, so run them together: the wall time becomes the slowest
+        # search rather than the sum of all of them
+        return await asyncio.gather(*(search_query(qr) for qr in query_result["search_queries"]))
+
+    for jira, slab, email, slack in asyncio.run(search_all()):
+        jiras += jira
+        slabs += slab
+        emails += email
+        slacks += slack
     
     all_docs =  slabs + jiras + emails + slacks
-    all_docs.sort(key=lambda x: x.search_score, reverse=True)
+    all_docs.sort(key=attrgetter("search_score"), reverse=True)
 
     r = _format_research(all_docs)
     return {'documents': all_docs,
@@ -84,35 +84,22 @@ Also make a brief write up of a summary of everything you know about them. Keep
 def _get_documents(p:person,from_date = datetime.now()-timedelta(weeks=2), to_date=datetime.now()):
 
     
-    jiras = searcher.search_by_username(
-        index="jira_issues",
+    # One _msearch for all indexes instead of a round-trip per index
+    found = searcher.search_indexes_by_username(
+        {
+            "jira_issues": 100,
+            "email_messages": 50,
+            "slack_messages": 100,
+            "bitbucket_pull_requests": 30,
+        },
         username=f"{p.first} {p.last}", 
         from_date=from_date,
         to_date=to_date,
-        size=100
-    )
-    emails = searcher.search_by_username(
-        index="email_messages",
-        username=f"{p.first} {p.last}", 
-        from_date=from_date,
-        to_date=to_date,
-        size=50
-    )
-    slacks = searcher.search_by_username(
-        index="slack_messages",
-        username=f"{p.first} {p.last}", 
-        from_date=from_date,
-        to_date=to_date,
-        size=100
-    )
-
-    bbs = searcher.search_by_username(
-        index="bitbucket_pull_requests",
-        username=f"{p.first} {p.last}", 
-        from_date=from_date,
-        to_date=to_date,
-        size=30
     )
+    jiras = found["jira_issues"]
+    emails = found["email_messages"]
+    slacks = found["slack_messages"]
+    bbs = found["bitbucket_pull_requests"]
 
     all_docs =  jiras + emails + slacks + bbs
     return all_docs
@@ -7,6 +7,8 @@ from prefect_data_getters.utilities.people import HYPERION,person
 from prefect_data_getters.utilities.timing import print_human_readable_delta
 import prefect_data_getters.utilities.constants as C
 import asyncio
+import heapq
+from operator import attrgetter
 
 searcher = MultiSourceSearcher()
 
@@ -46,8 +48,8 @@ def _get_documents(document_query):
         to_date=datetime.now(),
         top_k=50
     ))
-    all_docs.sort(key=lambda x: x.search_score, reverse=True)
-    return all_docs[:15]
+    # Only the best 15 are kept, so select them without sorting everything
+    return heapq.nlargest(15, all_docs, key=attrgetter("search_score"))
 
 
 if __name__ == "__main__":
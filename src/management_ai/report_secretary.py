@@ -68,31 +68,21 @@ e.g. Adam	Tomorrow morning	API ingestion issues have been rising
 def _get_documents(from_date = datetime.now()-timedelta(days=2), to_date=datetime.now()):
 
     
-    jiras = searcher.search_boring_search(
-        index="jira_issues",
+    # One _msearch for all indexes instead of a round-trip per index
+    found = searcher.search_indexes_by_username(
+        {
+            "jira_issues": 100,
+            "email_messages": 100,
+            "slack_messages": 200,
+            "bitbucket_pull_requests": 100,
+        },
         from_date=from_date,
         to_date=to_date,
-        size=100
-    )
-    emails = searcher.search_boring_search(
-        index="email_messages",
-        from_date=from_date,
-        to_date=to_date,
-        size=100
-    )
-    slacks = searcher.search_boring_search(
-        index="slack_messages",
-        from_date=from_date,
-        to_date=to_date,
-        size=200
-    )
-
-    bbs = searcher.search_boring_search(
-        index="bitbucket_pull_requests",
-        from_date=from_date,
-        to_date=to_date,
-        size=100
     )
+    jiras = found["jira_issues"]
+    emails = found["email_messages"]
+    slacks = found["slack_messages"]
+    bbs = found["bitbucket_pull_requests"]
 
 
     for e in emails:
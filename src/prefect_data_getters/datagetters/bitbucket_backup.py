@@ -3,7 +3,7 @@ from typing import List, Optional
 from prefect import flow, task
 from langchain.schema import Document
 from prefect_data_getters.exporters.jira import get_bitbucket_client, format_pull_request_to_document
-from prefect_data_getters.stores.vectorstore import batch_process_and_store, get_embeddings_and_vectordb
+from prefect_data_getters.stores.vectorstore import batch_process_and_store
 
 WORKSPACE_NAME = "omnidiandevelopmentteam"
 
@@ -50,8 +50,7 @@ def fetch_all_recent_pull_requests_task(earliest_date: Optional[datetime] = None
 
 @task
 def store_documents_in_vectorstore(documents: List[Document]):
-    embeddings, vectorstore = get_embeddings_and_vectordb("bitbucket_pull_requests")
-    batch_process_and_store(documents, vectorstore, batch_size=1000)
+    batch_process_and_store(documents, "bitbucket_pull_requests", batch_size=1000)
 
 @flow(name="bitbucket-pr-backup-flow", log_prints=True, timeout_seconds=3600)
 def bitbucket_pr_backup_flow(earliest_date: Optional[str] = None):
@@ -7,7 +7,7 @@ from prefect_data_getters.enrichers.gmail_email_processing_flow import process_e
 from prefect_data_getters.exporters.gmail import process_message
 from prefect_data_getters.stores.elasticsearch import upsert_documents
 from prefect_data_getters.utilities import constants as C  
-from prefect_data_getters.stores.vectorstore import batch_process_and_store, get_embeddings_and_vectordb
+from prefect_data_getters.stores.vectorstore import batch_process_and_store
 from prefect.artifacts import create_markdown_artifact
 
 from prefect_data_getters.exporters.gmail import parse_date
@@ -16,9 +16,6 @@ from prefect_data_getters.exporters.gmail import get_email_body
 import os
 from prefect import flow
 from prefect_data_getters.exporters.gmail import get_messages, process_message
-from elasticsearch import Elasticsearch
-
-es_client = Elasticsearch(C.ES_URL)
 
 @task
 def retrieve_messages(days_ago: int):
@@ -39,9 +36,8 @@ def process_messages(messages: list):
 
 @task
 def store_documents_in_vectorstore(documents: List[Document]):
-    embeddings, vectorstore = get_embeddings_and_vectordb("email_messages")
     batch_size = 1000  # Adjust based on your needs
-    batch_process_and_store(documents, vectorstore)
+    batch_process_and_store(documents, "email_messages")
 
 
 @flow(name="gmail-mbox-backup-flow", log_prints=True, timeout_seconds=3600)
@@ -66,18 +62,23 @@ def gmail_mbox_backup_flow(days_ago: int=1):
             print(f"Error processing message: {e}")
             continue
 
-    upsert_documents(ret_emails, "email_messages_raw", "google-id")
-    email_ids = [e["google-id"] for e in ret_emails]
-
-    
     if not messages:
         print(f"No messages found from the past {days_ago} days.")
         return
     
     print(f"Retrieved {len(messages)} messages. Processing...")
     documents = process_messages(messages)
-    i=1
-    store_documents_in_vectorstore(documents)
+    # The vector store write does not depend on the raw copies, so embed and store the
+    # documents on the task runner while the raw messages are upserted
+    vector_store_future = store_documents_in_vectorstore.submit(documents)
+
+    result = upsert_documents(ret_emails, "email_messages_raw", "google-id")
+    email_ids = [e["google-id"] for e in ret_emails]
+
+    vector_store_future.result()
+    if result["failed"]:
+        # Fail the flow as a failed bulk request used to, once the vector store write has finished
+        raise Exception(f"{result['failed']} raw email upserts failed: {result['failures'][:5]}")
     return email_ids
 
     
@@ -2,7 +2,7 @@
 from prefect import flow, task
 from datetime import datetime, timedelta
 from prefect_data_getters.exporters import add_default_metadata
-from prefect_data_getters.stores.vectorstore import batch_process_and_store, get_embeddings_and_vectordb
+from prefect_data_getters.stores.vectorstore import batch_process_and_store
 from prefect_data_getters.exporters.google_calendar import authenticate_google_calendar, format_event_to_document
 from langchain_community.vectorstores.utils import filter_complex_metadata
 
@@ -60,8 +60,7 @@ def store_documents_in_vectorstore(documents: list):
     """
     Stores the processed documents in the vector store.
     """
-    embeddings, vectorstore = get_embeddings_and_vectordb("google_calendar_events")
-    batch_process_and_store(documents, vectorstore)
+    batch_process_and_store(documents, "google_calendar_events")
 
 @flow(name="google-calendar-backup-flow", log_prints=True, timeout_seconds=3600)
 def google_calendar_backup_flow(days: int = 1):
@@ -2,7 +2,7 @@ from prefect import flow, task
 from langchain.schema import Document
 from typing import List
 from prefect_data_getters.exporters import add_default_metadata
-from prefect_data_getters.stores.vectorstore import batch_process_and_store, get_embeddings_and_vectordb
+from prefect_data_getters.stores.vectorstore import batch_process_and_store
 from prefect_data_getters.exporters.jira import get_jira_client, format_issue_to_document 
 
 @task
@@ -30,9 +30,8 @@ def process_issues_to_documents(issues: List[dict]) -> List[Document]:
 
 @task
 def store_documents_in_vectorstore(documents: List[Document]):
-    embeddings, vectorstore = get_embeddings_and_vectordb("jira_issues")
     batch_size = 1000  # Adjust based on your needs
-    batch_process_and_store(documents, vectorstore)
+    batch_process_and_store(documents, "jira_issues")
 
 @flow(name="jira-backup-flow", log_prints=True, timeout_seconds=3600)
 def jira_backup_flow():
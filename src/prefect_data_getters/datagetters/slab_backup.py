@@ -3,7 +3,7 @@ from langchain.schema import Document
 from typing import List
 from prefect_data_getters.exporters import add_default_metadata
 from prefect_data_getters.utilities.constants import SLAB_BACKUP_DIR
-from prefect_data_getters.stores.vectorstore import batch_process_and_store, get_embeddings_and_vectordb
+from prefect_data_getters.stores.vectorstore import batch_process_and_store
 from langchain_community.vectorstores.utils import filter_complex_metadata
 from prefect_data_getters.exporters.slab import process_slab_docs
 
@@ -18,15 +18,13 @@ def process_data_dir(split) -> List[Document]:
 @task
 def store_document_chunks_in_vectorstore(documents: List[Document]):
     batch_size = 1000 
-    embeddings, vectorstore = get_embeddings_and_vectordb("slab_document_chunks")
-    batch_process_and_store(documents, vectorstore)
+    batch_process_and_store(documents, "slab_document_chunks")
 
 
 @task
 def store_full_documents_in_vectorstore(documents: List[Document]):
     batch_size = 1000 
-    embeddings, vectorstore = get_embeddings_and_vectordb("slab_documents")
-    batch_process_and_store(documents, vectorstore)
+    batch_process_and_store(documents, "slab_documents")
 
 
 @flow(name="slab-backup-flow", log_prints=True)
@@ -5,7 +5,7 @@ from prefect_data_getters.utilities.prefect import get_last_successful_flow_run_
 from datetime import datetime, timedelta
 from prefect_data_getters.exporters.slack.slack_backup import do_backup  # Adjust the import as needed
 from prefect_data_getters.exporters.slack import slack_postprocess
-from prefect_data_getters.stores.vectorstore import batch_process_and_store, get_embeddings_and_vectordb
+from prefect_data_getters.stores.vectorstore import batch_process_and_store
 from prefect_data_getters.utilities import constants as C
 from prefect.artifacts import create_markdown_artifact
 
@@ -38,8 +38,7 @@ def postprocess_json_files(backup_directory):
 
 @task
 def store_vector_db(messages, backupdir):
-    (emb, vecdb) = get_embeddings_and_vectordb("slack_messages")
-    batch_process_and_store(messages, vecdb, batch_size=40000)
+    batch_process_and_store(messages, "slack_messages", batch_size=40000)
 
 
 
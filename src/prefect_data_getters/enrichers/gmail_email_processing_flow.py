@@ -3,26 +3,18 @@ import logging
 import prefect
 from prefect import flow, task
 from typing import List, Dict, Optional
-from elasticsearch import Elasticsearch
 from prefect_data_getters.exporters.gmail import get_messages_by_query, parse_date
 from prefect_data_getters.exporters.gmail import get_email_body, apply_labels_to_email
 import json
 from prefect_data_getters.utilities import constants as C
 from prefect_data_getters.enrichers.gmail_email_processor_take_3 import EmailExtractor
-from prefect_data_getters.stores.elasticsearch import upsert_documents
+from prefect_data_getters.stores.elasticsearch import existing_ids, load_documents, search_sorted, upsert_documents
 
-es_client = Elasticsearch(C.ES_URL)
 email_processor = EmailExtractor()
 
-def check_existing_ids(email_ids: List[str]) -> List[str]:
+def check_existing_ids(email_ids: List[str]) -> set[str]:
     """Query Elasticsearch to find already-processed email IDs."""
-    response = es_client.search(
-        index="email_messages_llm_processed",
-        query={"ids": {"values": email_ids}},
-        size=len(email_ids),
-    )
-    existing_ids = [hit["_id"] for hit in response["hits"]["hits"]]
-    return existing_ids
+    return existing_ids(email_ids, "email_messages_llm_processed")
 
 
 @task(retries=3)
@@ -34,7 +26,7 @@ def utilize_analysis(email_id: str, analysis: Dict):
         suggested_labels.append("Urgent")
     if(analysis.get("is_important", False)):
         suggested_labels.append("Important")
-    logger.debug(f"Suggested labels for email {email_id}: {suggested_labels}")
+    logger.debug("Suggested labels for email %s: %s", email_id, suggested_labels)
     apply_labels_to_email(email_id=email_id, 
                           category_labels=suggested_labels, 
                           team_labels=analysis.get("teams"), 
@@ -55,7 +47,10 @@ def process_email_and_upsert(email: Dict) -> Dict:
         processed["date"] = parse_date(email["date"])
         processed["date_processed"] = datetime.now().isoformat()
         processed["email_content"] = {"from": email.get("from"), "to": email.get("to"), "subject": email.get("subject"), "text": email.get("text"), "date": parse_date(email["date"])}
-        upsert_documents([processed], "email_messages_llm_processed", "google-id")
+        # Written synchronously so a failed write fails this task and its retries run
+        result = upsert_documents([processed], "email_messages_llm_processed", "google-id")
+        if result["failed"]:
+            raise Exception(f"Upsert failed: {result['failures']}")
         
         return processed
     except Exception as e:
@@ -69,15 +64,16 @@ def process_emails_by_google_ids(google_ids: Optional[List[str]] | None = None,
 
     if not google_ids:
         # Retrieve the top `num_docs` documents ordered by date in descending order
-        query = {"sort": [{"date": {"order": "desc"}}]}
-        response = es_client.search(index="email_messages_raw", body=query, size=num_search_if_no_ids)
-        retrieved_docs = {doc["_id"]: doc["_source"] for doc in response["hits"]["hits"]}
+        hits = search_sorted("email_messages_raw", [{"date": {"order": "desc"}}], num_search_if_no_ids)
+        retrieved_docs = {doc["_id"]: doc["_source"] for doc in hits}
         logger.info(f"Retrieved top {len(retrieved_docs)} documents ordered by date.")
     else:
         # Retrieve messages based on provided Google IDs
-        query = {"query": {"ids": {"values": google_ids}}}
-        response = es_client.search(index="email_messages_raw", body=query, size=len(google_ids))
-        retrieved_docs = {doc["_id"]: doc["_source"] for doc in response["hits"]["hits"]}
+        retrieved_docs = {
+            google_id: source
+            for google_id, source in zip(google_ids, load_documents(google_ids, "email_messages_raw"))
+            if source is not None
+        }
 
         # Log missing IDs
         missing_ids = [google_id for google_id in google_ids if google_id not in retrieved_docs]
@@ -87,9 +83,9 @@ def process_emails_by_google_ids(google_ids: Optional[List[str]] | None = None,
     email_ids = list(retrieved_docs.keys())
 
     if not overwrite_existing:
-        existing_ids = check_existing_ids(email_ids)
-        logger.info(f"Found {len(existing_ids)} already processed emails.")
-        new_emails = [email for email in retrieved_docs.values() if email["google-id"] not in existing_ids]
+        already_processed = check_existing_ids(email_ids)
+        logger.info(f"Found {len(already_processed)} already processed emails.")
+        new_emails = [email for email in retrieved_docs.values() if email["google-id"] not in already_processed]
     else:
         new_emails = list(retrieved_docs.values())
 
@@ -108,15 +104,14 @@ def utilize_analysis_flow(email_ids: List[str]):
     """Utilize the analysis from the processed email."""
     logger = prefect.get_run_logger()
     # logger.setLevel(logging.DEBUG)
-    for email_id in email_ids:
-        try:
-            retrieved_doc = es_client.get_source(index="email_messages_llm_processed", id=email_id)
-            analysis = retrieved_doc.raw.get("analysis", {})
-        except Exception as e:
-            logger.error(f"Error retrieving email {email_id}: {e}")
+    retrieved_docs = load_documents(email_ids, "email_messages_llm_processed")
+    for email_id, retrieved_doc in zip(email_ids, retrieved_docs):
+        if retrieved_doc is None:
+            logger.error(f"Error retrieving email {email_id}: not found")
             continue
+        analysis = retrieved_doc.get("analysis", {})
         utilize_analysis(email_id, analysis)
-        logger.debug(f"Utilized analysis for email {email_id}.")
+        logger.debug("Utilized analysis for email %s.", email_id)
     logger.info(f"Finished utilizing analysis for all emails in batch of len {len(email_ids)}.")
     return email_ids
 
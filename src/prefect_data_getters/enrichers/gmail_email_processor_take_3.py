@@ -73,10 +73,12 @@ FORMAT_INSTRUCTIONS = _struct_parser.get_format_instructions()
 
 # ────────────────────────────── PROCESSOR ────────────────────────────────── #
 
+_EMPTY_ARRAY_ANSWERS = frozenset(("none", "n/a", "na", ""))
+
 def _clean_array(text: str) -> List[str]:
     """Returns [] for 'none/na', else parses JSON or comma-lists."""
     text   = text.strip()
-    if text.lower() in ("none", "n/a", "na", ""):
+    if text.lower() in _EMPTY_ARRAY_ANSWERS:
         return []
     try:
         # if model already gave JSON array
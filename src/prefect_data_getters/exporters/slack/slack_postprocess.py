@@ -5,9 +5,10 @@ from langchain_chroma import Chroma
 from langchain.schema import Document
 from collections import defaultdict
 import glob
-from langchain_community.vectorstores.utils import filter_complex_metadata
-from langchain_community.vectorstores.utils import filter_complex_metadata
+import re
 
+# Metadata value types the vector stores accept; see langchain's filter_complex_metadata.
+_METADATA_TYPES = (str, bool, int, float)
 
 backup_dir = "/home/dusty/workspace/omnidian/slack-export/20240925-181512-slack_export"
 
@@ -30,11 +31,12 @@ def load_slack_data():
 # ============================
 #  Replace User Mentions
 # ============================
+_USER_MENTION = re.compile(r"<@([^>]+)>")
+
 def replace_user_mentions(text, user_map):
+    # One pass over the text with a dict lookup per mention, rather than one replace per known user
     if("<" in text):
-        for user_id, real_name in user_map.items():
-            mention = f"<@{user_id}>"
-            text = text.replace(mention, real_name)
+        text = _USER_MENTION.sub(lambda m: user_map.get(m.group(1), m.group(0)), text)
     return text
 
 # ============================
@@ -76,10 +78,13 @@ def process_slack_messages(messages, user_map, channel_name):
         #unique id
         id = f"{channel_name}_{message.get('ts')}"
         if text is not None and len(text) > 0:
+            # Drop complex values while building the document, rather than re-walking and
+            # reassigning every document's metadata in a filter_complex_metadata pass afterwards
+            metadata = {k: v for k, v in metadata.items() if isinstance(v, _METADATA_TYPES)}
             document = Document(id = id, page_content=text, metadata=metadata)
             # document.id = id
             processed_documents.append(document)
-    return filter_complex_metadata(processed_documents)
+    return processed_documents
 
 
 # Get files to process
@@ -1,29 +1,73 @@
+from __future__ import annotations
 import pprint
-from langchain_core.documents import Document
 from datetime import datetime
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
 from prefect_data_getters.utilities.constants import VECTOR_STORE_NAMES  
-import uuid
+import hashlib
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 
 class _AIDocument:
-    def __init__(self, doc: Document):
+    # Searches and ingests build these in large batches, so instances carry no __dict__.
+    # Subclasses declare an empty __slots__ to keep it that way.
+    __slots__ = ("_document", "_metadata", "id", "page_content", "search_score", "_ctx_cache", "_str_cache")
+
+    # Metadata key that holds the document id; None falls back to the wrapped Document's id.
+    _id_field = None
+    # Display name of the document type, set by each subclass.
+    _type_name = None
+
+    def __init__(self, doc: Document, id: str | None = None):
         self._document = doc
-        self._type_name = None
-        self.id = self._document.id
+        self._metadata = doc.metadata if doc.metadata is not None else {}
+        if id is None:
+            id = self._metadata.get(self._id_field) if self._id_field else doc.id
+        self.id = id
         self.page_content = self._document.page_content
-        self.search_score = None
+        # Always a float so ranking can sort with attrgetter("search_score")
+        self.search_score = 0.0
+        # Rendered strings are cached until the content changes.
+        self._ctx_cache = None
+        self._str_cache = None
     
     def set_page_content(self, content: str) -> None:
         self._document.page_content = content
         self.page_content = content
+        self._ctx_cache = None
+        self._str_cache = None
 
+    def copy(self) -> _AIDocument:
+        """
+        Returns an independent copy with the same id and score. Its content can be changed
+        without affecting this document; the metadata is shared, as it is read-only.
+        """
+        doc = self._document
+        # A new Document rather than copy.copy, which shares the field dict of pydantic v1 models
+        duplicate = type(self)(type(doc)(page_content=doc.page_content, metadata=doc.metadata, id=doc.id))
+        # Ids derived from the content would change with it, so keep this document's id
+        duplicate.id = self.id
+        duplicate.search_score = self.search_score
+        return duplicate
+
+
+    @property
+    def metadata(self) -> dict:
+        """The wrapped document's metadata. Treat it as read-only."""
+        return self._metadata
 
     def _get_metadata(self, key, default=None):
         """Safely get a metadata value by key, returning `default` if it doesn't exist."""
-        return self._document.metadata.get(key, default) if self._document.metadata else default
+        return self._metadata.get(key, default)
 
     def __str__(self):
+        if self._str_cache is None:
+            self._str_cache = self._format_document_string()
+        return self._str_cache
+
+    def _format_document_string(self):
+        """Builds the string representation; subclasses extend this instead of `__str__`."""
         if self._type_name is None:
             raise NotImplementedError(self._document)
         else:
@@ -31,46 +75,48 @@ class _AIDocument:
 
     def _context_section(self):
         """Returns the context section if present in the metadata."""
-        context = self._get_metadata("context")
-        if context:
-            return f"""Context:
+        if self._ctx_cache is None:
+            context = self._get_metadata("context")
+            if context:
+                self._ctx_cache = f"""Context:
 >>>>>>>>>>>>
 {context}
 >>>>>>>>>>>>
 """
-        return ""
+            else:
+                self._ctx_cache = ""
+        return self._ctx_cache
+
+# Public name for the document base class; callers import ``AIDocument`` from here.
+AIDocument = _AIDocument
+
+def _resolve_document_class(name: VECTOR_STORE_NAMES) -> type[_AIDocument]:
+    """Returns the document class used for the given vector store name."""
+    try:
+        return _DOCUMENT_CLASSES[name]
+    except KeyError:
+        raise ValueError(f"Unknown document type: {name}") from None
 
 def _create_document(doc: Document, name: VECTOR_STORE_NAMES) -> _AIDocument:
     """Factory function to create a document instance based on the vector store name."""
-    if name == "jira_issues":
-        return JiraDocument(doc)
-    elif name == "email_messages":
-        return EmailDocument(doc)
-    elif name == "slack_messages":
-        return SlackMessageDocument(doc)
-    elif name == "slab_documents":
-        return SlabDocument(doc)
-    elif name == "slab_document_chunks":
-        return SlabChunkDocument(doc)
-    elif name == "bitbucket_pull_requests":
-        return BitbucketPR(doc=doc)
-    else:
-        # Although we’ve covered all Literal options, this serves as a safeguard
-        raise ValueError(f"Unknown document type: {name}")
+    return _resolve_document_class(name)(doc)
     
 
 def convert_documents_to_ai_documents(docs: list[Document], doc_store_name: VECTOR_STORE_NAMES) -> list[_AIDocument]:
-    return [_create_document(d, doc_store_name) for d in docs]
+    if not docs:
+        return []
+    # Resolve the class once for the batch and bind it locally for the comprehension.
+    document_class = _resolve_document_class(doc_store_name)
+    return [document_class(d) for d in docs]
 
 class JiraDocument(_AIDocument):
-    def __init__(self, doc):
-        super().__init__(doc)
-        self._type_name = "Jira Document"
-        self.id = self._get_metadata("key")
+    __slots__ = ()
+    _id_field = "key"
+    _type_name = "Jira Document"
 
-    def __str__(self):
+    def _format_document_string(self):
         s = f"""
-{super().__str__()}
+{super()._format_document_string()}
 Jira Key: {self._get_metadata("key")}
 Issue Type: {self._get_metadata("issuetype_name")}
 Status: {self._get_metadata("status_name")}
@@ -82,8 +128,7 @@ Content:
 >>>>>>>>>>>>
 {self._document.page_content}
 >>>>>>>>>>>>
-{self._context_section()}
-Additional Metadata:
+{self._context_section()}Additional Metadata:
 {pprint.pformat(self._document.metadata)}
 END: {self._get_metadata("key")}
 >>>>>>>>>>>>
@@ -91,14 +136,13 @@ END: {self._get_metadata("key")}
         return s
 
 class EmailDocument(_AIDocument):
-    def __init__(self, doc):
-        super().__init__(doc)
-        self._type_name = "Email Document"
-        self.id = self._get_metadata("message-id")
+    __slots__ = ()
+    _id_field = "message-id"
+    _type_name = "Email Document"
 
-    def __str__(self):
+    def _format_document_string(self):
         s = f"""
-{super().__str__()}
+{super()._format_document_string()}
 Message ID: {self._get_metadata("message-id")}
 From: {self._get_metadata("from")}
 To: {self._get_metadata("to")}
@@ -108,8 +152,7 @@ Content:
 >>>>>>>>>>>>
 {self._document.page_content}
 >>>>>>>>>>>>
-{self._context_section()}
-Additional Metadata:
+{self._context_section()}Additional Metadata:
 {pprint.pformat(self._document.metadata)}
 END: {self._get_metadata("message-id")}
 >>>>>>>>>>>>
@@ -117,17 +160,19 @@ END: {self._get_metadata("message-id")}
         return s
 
 class SlackMessageDocument(_AIDocument):
+    __slots__ = ()
+    _type_name = "Slack Message Document"
+
     def __init__(self, doc):
-        super().__init__(doc)
-        self._type_name = "Slack Message Document"
-        self.id = f"{self._get_metadata("channel")}_{self._get_metadata("ts")}"
+        md = doc.metadata or {}
+        super().__init__(doc, id=f"{md.get('channel')}_{md.get('ts')}")
 
-    def __str__(self):
+    def _format_document_string(self):
         timestamp = self._get_metadata("ts")
         formatted_timestamp = datetime.fromtimestamp(timestamp).isoformat() if timestamp else "N/A"
         
         s = f"""
-{super().__str__()}
+{super()._format_document_string()}
 User: {self._get_metadata("user")}
 Channel: {self._get_metadata("channel")}
 Timestamp: {formatted_timestamp}
@@ -135,8 +180,7 @@ Content:
 >>>>>>>>>>>>
 {self._document.page_content}
 >>>>>>>>>>>>
-{self._context_section()}
-Additional Metadata:
+{self._context_section()}Additional Metadata:
 {pprint.pformat(self._document.metadata)}
 END: {self._get_metadata("user")}
 >>>>>>>>>>>>
@@ -144,14 +188,13 @@ END: {self._get_metadata("user")}
         return s
 
 class SlabDocument(_AIDocument):
-    def __init__(self, doc):
-        super().__init__(doc)
-        self.id = self._get_metadata("document_id")
-        self._type_name = "Slab Document"
+    __slots__ = ()
+    _id_field = "document_id"
+    _type_name = "Slab Document"
 
-    def __str__(self):
+    def _format_document_string(self):
         s = f"""
-{super().__str__()}
+{super()._format_document_string()}
 Document ID: {self._get_metadata("document_id")}
 Title: {self._get_metadata("title")}
 Type: {self._get_metadata("type", "slab_document")}
@@ -162,8 +205,7 @@ Content:
 >>>>>>>>>>>>
 {self._document.page_content}
 >>>>>>>>>>>>
-{self._context_section()}
-Additional Metadata:
+{self._context_section()}Additional Metadata:
 {pprint.pformat(self._document.metadata)}
 END: {self._get_metadata("document_id")}
 >>>>>>>>>>>>
@@ -171,15 +213,19 @@ END: {self._get_metadata("document_id")}
         return s
 
 class SlabChunkDocument(SlabDocument):
+    __slots__ = ()
+    _type_name = "Slab Chunk Document"
+
     def __init__(self, doc):
-        super().__init__(doc)
-        self._type_name = "Slab Chunk Document"
-        #TODO: using a guid for now but this will not allow us to get the original document from ES.
-        self.id = str(uuid.uuid1())
+        # Deterministic id: parent document id plus a hash of the chunk content,
+        # so re-ingesting identical chunks upserts instead of duplicating.
+        md = doc.metadata or {}
+        content_hash = hashlib.blake2b(doc.page_content.encode("utf-8", "ignore"), digest_size=8).hexdigest()
+        super().__init__(doc, id=f"{md.get('document_id')}_{content_hash}")
 
-    def __str__(self):
+    def _format_document_string(self):
         s = f"""
-{super().__str__()}
+{super()._format_document_string()}
 Document ID: {self._get_metadata("document_id")}
 Title: {self._get_metadata("title")}
 Type: {self._get_metadata("type", "slab_chunk")}
@@ -190,8 +236,7 @@ Content:
 >>>>>>>>>>>>
 {self._document.page_content}
 >>>>>>>>>>>>
-{self._context_section()}
-Additional Metadata:
+{self._context_section()}Additional Metadata:
 {pprint.pformat(self._document.metadata)}
 END: {self._get_metadata("document_id")}
 >>>>>>>>>>>>
@@ -200,14 +245,13 @@ END: {self._get_metadata("document_id")}
 
 
 class BitbucketPR(_AIDocument):
-    def __init__(self, doc):
-        super().__init__(doc)
-        self.id = self._get_metadata("id")
-        self._type_name = "Bitbucket Pull Request"
+    __slots__ = ()
+    _id_field = "id"
+    _type_name = "Bitbucket Pull Request"
 
-    def __str__(self):
+    def _format_document_string(self):
         s = f"""
-{super().__str__()}
+{super()._format_document_string()}
 Document ID: {self._get_metadata("id")}
 Repository: {self._get_metadata("repo_slug")}
 Title: {self._get_metadata("title")}
@@ -221,10 +265,20 @@ Content:
 >>>>>>>>>>>>
 {self._document.page_content}
 >>>>>>>>>>>>
-{self._context_section()}
-Additional Metadata:
+{self._context_section()}Additional Metadata:
 {pprint.pformat(self._document.metadata)}
 END: {self._get_metadata("document_id")}
 >>>>>>>>>>>>
 """
-        return s
\ No newline at end of file
+        return s
+
+
+# Vector store name -> document class, used by the factory functions above.
+_DOCUMENT_CLASSES: dict[str, type[_AIDocument]] = {
+    "jira_issues": JiraDocument,
+    "email_messages": EmailDocument,
+    "slack_messages": SlackMessageDocument,
+    "slab_documents": SlabDocument,
+    "slab_document_chunks": SlabChunkDocument,
+    "bitbucket_pull_requests": BitbucketPR,
+}
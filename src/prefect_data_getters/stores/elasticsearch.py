@@ -1,20 +1,283 @@
-from elasticsearch import Elasticsearch, helpers
+import hashlib
+import os
+import threading
+from typing import TYPE_CHECKING
+import orjson
 import prefect_data_getters.utilities.constants as C
 
-es = Elasticsearch(C.ES_URL)
+# The elasticsearch client is imported on first use so flows that never touch
+# Elasticsearch do not pay for loading it.
+if TYPE_CHECKING:
+    from elasticsearch import Elasticsearch
 
-def upsert_documents(docs: list[dict], index_name: str, id_field: str):
-    actions = []
+_es_client = None
+_es_lock = threading.Lock()
 
+# Bulk tuning defaults. Keep chunk_size <= max_chunk_bytes / average document size.
+BULK_THREAD_COUNT = min(os.cpu_count() or 1, 8)
+BULK_CHUNK_SIZE = 2000
+BULK_MAX_CHUNK_BYTES = 50 * 1024 * 1024
+# Retries for chunks rejected with 429 (too many requests), with exponential backoff.
+BULK_MAX_RETRIES = 3
+
+# Sorted searches larger than this are paged with search_after over a point in time kept open this long.
+SEARCH_PAGE_SIZE = 1000
+SEARCH_PIT_KEEP_ALIVE = "1m"
+
+def get_client() -> "Elasticsearch":
+    """
+    Returns the process-wide Elasticsearch client, creating it on first use.
+    Code that builds its own client for bulk work should use the same transport settings.
+    """
+    global _es_client
+    if _es_client is None:
+        with _es_lock:
+            # Re-check under the lock so concurrent workers share one connection pool
+            if _es_client is None:
+                from elasticsearch import Elasticsearch
+                from elasticsearch.serializer import OrjsonSerializer
+                # Compressed requests shrink bulk payloads; the pool is sized for parallel_bulk threads
+                _es_client = Elasticsearch(
+                    C.ES_URL,
+                    http_compress=True,
+                    connections_per_node=max(BULK_THREAD_COUNT * 2, 25),
+                    request_timeout=60,
+                    retry_on_timeout=True,
+                    max_retries=3,
+                    # orjson is much faster than the stdlib json for bulk action lines
+                    serializer=OrjsonSerializer(),
+                )
+    return _es_client
+
+def _upsert_action(doc: dict, index_name: str, id_field: str) -> dict:
+    return {
+        "_op_type": "update",
+        "_index": index_name,
+        "_id": doc[id_field],
+        "doc": doc,
+        "doc_as_upsert": True
+    }
+
+def _iter_actions(docs: list[dict], index_name: str, id_field: str):
+    """Yields one upsert action per document so the bulk helper never holds the full list."""
     for doc in docs:
-        doc_id = doc[id_field]
-        action = {
-            "_op_type": "update",
-            "_index": index_name,
-            "_id": doc_id,
-            "doc": doc,
-            "doc_as_upsert": True 
-        }
-        actions.append(action)
-
-    helpers.bulk(es, actions)
+        yield _upsert_action(doc, index_name, id_field)
+
+def _run_bulk(
+    actions,
+    count: int,
+    thread_count: int = BULK_THREAD_COUNT,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    max_chunk_bytes: int = BULK_MAX_CHUNK_BYTES,
+) -> dict:
+    """
+    Sends `count` bulk actions. Failures, including transport errors, are reported per
+    action instead of raising, so one bad document does not fail the whole batch.
+
+    Returns:
+        dict: {"success": int, "failed": int, "failures": list} where failures holds the
+        bulk response item of each failed action so callers can retry just those.
+    """
+    from elasticsearch import helpers
+    if count <= chunk_size:
+        # A single chunk gains nothing from a thread pool, so send it inline
+        results = helpers.streaming_bulk(
+            get_client(),
+            actions,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            raise_on_error=False,
+            raise_on_exception=False,
+            max_retries=BULK_MAX_RETRIES,
+            initial_backoff=2,
+            max_backoff=600,
+            request_timeout=120,
+        )
+    else:
+        results = helpers.parallel_bulk(
+            get_client(),
+            actions,
+            thread_count=thread_count,
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            queue_size=4,
+            raise_on_error=False,
+            raise_on_exception=False,
+            request_timeout=120,
+        )
+
+    succeeded = 0
+    failures = []
+    for ok, item in results:
+        if ok:
+            succeeded += 1
+        else:
+            failures.append(item)
+    if failures:
+        # One line rather than one per action; callers get every failure in the result
+        print(f"{len(failures)} bulk actions failed, e.g. {failures[:3]}")
+    return {"success": succeeded, "failed": len(failures), "failures": failures}
+
+def upsert_documents(
+    docs: list[dict],
+    index_name: str,
+    id_field: str,
+    thread_count: int = BULK_THREAD_COUNT,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    max_chunk_bytes: int = BULK_MAX_CHUNK_BYTES,
+) -> dict:
+    """
+    Upserts documents into an index, spreading bulk chunks across a thread pool.
+
+    Returns:
+        dict: {"success": int, "failed": int, "failures": list} as returned by `_run_bulk`.
+    """
+    return _run_bulk(
+        _iter_actions(docs, index_name, id_field),
+        len(docs),
+        thread_count=thread_count,
+        chunk_size=chunk_size,
+        max_chunk_bytes=max_chunk_bytes,
+    )
+
+def load_documents(doc_ids: list[str], index_name: str) -> list[dict | None]:
+    """
+    Fetches several documents by id in a single _mget request.
+
+    Returns:
+        list[dict | None]: The `_source` of each document in the order of `doc_ids`, or None where not found.
+    """
+    if not doc_ids:
+        return []
+    response = get_client().mget(index=index_name, ids=doc_ids)
+    sources = [None] * len(doc_ids)
+    for i, d in enumerate(response["docs"]):
+        if d.get("found"):
+            sources[i] = d["_source"]
+    return sources
+
+def search_sorted(index_name: str, sort: list, limit: int, query: dict | None = None) -> list[dict]:
+    """
+    Fetches up to `limit` hits in the given sort order. Beyond SEARCH_PAGE_SIZE hits the results are
+    paged with search_after over a point in time, so shards never build a `limit`-sized queue and
+    large limits do not run into the index's max_result_window.
+
+    Returns:
+        list[dict]: The raw hits.
+    """
+    client = get_client()
+    if limit <= SEARCH_PAGE_SIZE:
+        return client.search(index=index_name, query=query, sort=sort, size=limit, track_total_hits=False)["hits"]["hits"]
+
+    pit_id = client.open_point_in_time(index=index_name, keep_alive=SEARCH_PIT_KEEP_ALIVE)["id"]
+    hits = []
+    search_after = None
+    try:
+        while len(hits) < limit:
+            response = client.search(
+                pit={"id": pit_id, "keep_alive": SEARCH_PIT_KEEP_ALIVE},
+                query=query,
+                sort=sort,
+                size=min(SEARCH_PAGE_SIZE, limit - len(hits)),
+                search_after=search_after,
+                track_total_hits=False,
+            )
+            page = response["hits"]["hits"]
+            if not page:
+                break
+            hits.extend(page)
+            pit_id = response.get("pit_id", pit_id)
+            search_after = page[-1]["sort"]
+    finally:
+        client.close_point_in_time(id=pit_id)
+    return hits
+
+def existing_ids(doc_ids: list[str], index_name: str) -> set[str]:
+    """
+    Checks which of the given ids exist in an index with a single _mget request that fetches no `_source`.
+
+    Returns:
+        set[str]: The ids that were found.
+    """
+    if not doc_ids:
+        return set()
+    response = get_client().mget(index=index_name, ids=doc_ids, source=False)
+    return {d["_id"] for d in response["docs"] if d.get("found")}
+
+def delete_documents(doc_ids, index_name: str) -> dict:
+    """
+    Deletes documents by id with one bulk request. Ids that do not exist are reported as failures.
+
+    Args:
+        doc_ids (Iterable[str]): The ids to delete.
+        index_name (str): The index to delete from.
+
+    Returns:
+        dict: {"success": int, "failed": int, "failures": list} as returned by `_run_bulk`.
+    """
+    doc_ids = list(doc_ids)
+    actions = ({"_op_type": "delete", "_index": index_name, "_id": i} for i in doc_ids)
+    return _run_bulk(actions, len(doc_ids))
+
+def msearch(
+    searches: list[tuple[str, dict]],
+    max_concurrent_searches: int | None = None,
+    source_fields: list[str] | None = None,
+    source: bool = True,
+    request_cache: bool = False,
+    preference: str | None = None,
+) -> list[list]:
+    """
+    Runs several searches in a single _msearch request.
+
+    Args:
+        searches (list[tuple[str, dict]]): (index name, search body) pairs.
+        max_concurrent_searches (int, optional): Cap on searches the cluster runs at once.
+        source_fields (list[str], optional): Only return these `_source` fields.
+        source (bool): When False no `_source` is fetched and each hit is returned as an (id, score) tuple.
+        request_cache (bool): Cache the results in the shard request cache, which otherwise only caches
+            size=0 searches. Each search is also routed by a hash of its body so a repeat hits the same
+            shard copies and their cache. Only use it for bodies that do not depend on the current time.
+        preference (str, optional): Route every search to the shard copies chosen by this value, so
+            related searches (e.g. one user's report) reuse the same nodes' caches. Overrides the
+            body hash used with `request_cache`.
+
+    Returns:
+        list[list]: The raw hits (or (id, score) tuples) for each search, in the order given.
+
+    Raises:
+        Exception: If any search fails on the cluster, so a failure is not mistaken for no hits.
+    """
+    if not searches:
+        return []
+    source_filter = False if not source else source_fields
+    body = []
+    for index_name, query in searches:
+        if source_filter is not None:
+            query = {**query, "_source": source_filter}
+        header = {"index": index_name}
+        if request_cache:
+            header["request_cache"] = True
+            # kNN bodies carry the whole query vector, which orjson serializes far faster than json
+            header["preference"] = hashlib.blake2b(
+                orjson.dumps(query, option=orjson.OPT_SORT_KEYS, default=str), digest_size=8
+            ).hexdigest()
+        if preference:
+            header["preference"] = preference
+        body.append(header)
+        body.append(query)
+
+    kwargs = {}
+    if max_concurrent_searches:
+        kwargs["max_concurrent_searches"] = max_concurrent_searches
+    response = get_client().msearch(searches=body, **kwargs)
+
+    results = []
+    for (index_name, _), r in zip(searches, response["responses"]):
+        if "error" in r:
+            raise Exception(f"Search against {index_name} failed: {r['error']}")
+        if not source:
+            results.append([(hit["_id"], hit["_score"]) for hit in r["hits"]["hits"]])
+        else:
+            results.append(r["hits"]["hits"])
+    return results
@@ -1,10 +1,17 @@
 import asyncio
+import contextvars
+import hashlib
+import threading
+import time
+from functools import lru_cache, partial
+from operator import attrgetter
 from typing import List, Literal, Optional, Dict, Any
 from langchain_elasticsearch import ElasticsearchStore
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_ollama import ChatOllama
 from langchain.retrievers.document_compressors import LLMChainFilter
 import prefect_data_getters.stores.vectorstore as vectorstore
+import prefect_data_getters.stores.elasticsearch as es_store
 import prefect_data_getters.utilities.constants as C
 from datetime import datetime, timedelta
 from typing import Optional
@@ -17,6 +24,7 @@ from typing import List
 from typing import List, Literal, Optional, Annotated
 from datetime import datetime
 from langchain_elasticsearch.vectorstores import _hits_to_docs_scores
+from elasticsearch_dsl import Search
 from langchain_community.vectorstores import ElasticVectorSearch
 from langchain_huggingface import HuggingFacePipeline
 from transformers import pipeline, AutoTokenizer
@@ -29,6 +37,13 @@ class AcceptRejectDataStore(BaseModel):
         description="Indicates whether to use a document respond with true or false"
     )
 
+class StoreSelections(BaseModel):
+    """Responses indicating whether to accept or reject each datastore, in the order they were listed."""
+
+    decisions: List[bool] = Field(
+        description="One true or false per listed data store, in the same order"
+    )
+
 class AdditionalEmbeddingsAndKeywords(BaseModel):
     keywords: List[str] = Field(
         description="A list of keywords that a document should contain to align it with the initial query"
@@ -37,16 +52,114 @@ class AdditionalEmbeddingsAndKeywords(BaseModel):
         description="A list of phrases to turn into embeddings to search a RAG document store."
     )
 
+# LLM answers for a query (store selection, keyword/phrase expansion) are reused for this long.
+LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 1024
+# Finished search results are reused for a short time only, so newly indexed documents show up quickly.
+SEARCH_RESULT_CACHE_TTL_SECONDS = 60
+SEARCH_RESULT_CACHE_MAX_ENTRIES = 256
+# Query phrase embeddings kept in memory, keyed on (model, text hash). The cache is shared by every
+# searcher in the process and guarded by a lock, as embedding runs in worker threads.
+EMBEDDING_CACHE_MAX_ENTRIES = 4096
+_embedding_cache: dict[tuple[str, str], List[float]] = {}
+_embedding_cache_lock = threading.Lock()
+# Context window for the search LLM calls. Ollama allocates the KV cache for the whole window,
+# and the store selection and query expansion prompts are only a few thousand characters.
+SEARCH_LLM_NUM_CTX = 4096
+# The only fields read from search hits. Anything else, notably the stored embedding vector,
+# is left out of the response.
+HIT_SOURCE_FIELDS = ["text", "metadata"]
+# Rank offset for Reciprocal Rank Fusion; 60 is the usual choice and damps the weight of the very top ranks.
+RRF_K = 60
+
+# The metadata field holding the user for each store, so user searches name one concrete field.
+USERNAME_FIELDS: Dict[str, str] = {
+    "email_messages": "metadata.from",
+    "jira_issues": "metadata.assignee_displayName",
+    "slack_messages": "metadata.user",
+    "slab_documents": "metadata.owner",
+    "slab_document_chunks": "metadata.owner",
+    "bitbucket_pull_requests": "metadata.all_participants",
+}
+
+def _sum_scores_by_id(docs: List[AIDocument]) -> List[AIDocument]:
+    """Merges documents with the same id into the first one seen, summing their search scores."""
+    fused = {}
+    for doc in docs:
+        current = fused.get(doc.id)
+        if current is None:
+            fused[doc.id] = doc
+        else:
+            current.search_score += doc.search_score
+    return list(fused.values())
+
+@lru_cache(maxsize=256)
+def _build_es_filter(
+    keywords: tuple[str, ...],
+    from_date: Optional[datetime],
+    to_date: Optional[datetime],
+    metadata_items: tuple[tuple[str, Any], ...],
+) -> Optional[dict]:
+    """
+    Builds the Elasticsearch filter for a search. Results are cached and shared between calls,
+    so callers must not modify the returned dict.
+
+    Returns:
+        Optional[dict]: A bool/must filter, or None when there is nothing to filter on.
+    """
+    # Build keyword query for Elasticsearch, if keywords are provided
+    keyword_filter = {
+        "bool": {
+            "should": [{"match": {"text": keyword}} for keyword in keywords],
+            "minimum_should_match": 1,
+        }
+    } if keywords else None
+
+    # Build date range filter for Elasticsearch, if dates are provided
+    date_filter = {
+        "range": {
+            "post_datetime": {
+                "gte": from_date.isoformat() if from_date else None,
+                "lte": to_date.isoformat() if to_date else None
+            }
+        }
+    } if from_date or to_date else None
+
+
+    # Build metadata filter for Elasticsearch, if metadata_filter is provided
+    metadata_filter_query = {
+        "bool": {
+            "must": [{"match": {f"metadata.{key}": value}} for key, value in metadata_items]
+        }
+    } if metadata_items else None
+
+    # Combine filters, if applicable. Clauses go from most to least selective: exact metadata
+    # matches, then the date range, then the keyword text match, which is the most costly and
+    # matches the most documents
+    es_filter = {"bool": {"must": []}}
+    if metadata_filter_query:
+        es_filter["bool"]["must"].append(metadata_filter_query)
+    if date_filter:
+        es_filter["bool"]["must"].append(date_filter)
+    if keyword_filter:
+        es_filter["bool"]["must"].append(keyword_filter)
+    if not es_filter["bool"]["must"]:
+        es_filter = None  # Avoid adding empty filters
+    return es_filter
+
 class MultiSourceSearcher:
     def __init__(self) -> None:
         # Initialize embeddings
         self.embeddings = vectorstore.get_embeddings()
 
-        # Initialize Elasticsearch stores for each index
+        # Initialize Elasticsearch stores for each index. They all share the process-wide client,
+        # whose pool is opened here so the first search does not pay for the connection
+        es_client = es_store.get_client()
+        es_client.ping()
         self.stores = [
             {
                 "store": ElasticsearchStore(
-                    es_url=C.ES_URL,
+                    es_connection=es_client,
                     index_name=s["name"],
                     embedding=self.embeddings,
                 ),
@@ -55,16 +168,30 @@ class MultiSourceSearcher:
             }
             for s in C.data_stores
         ]
+        self._stores_by_name = {s["name"]: s for s in self.stores}
+        # Store selection depends on the descriptions, so a change to them must miss the cache
+        self._stores_key = hashlib.blake2b(
+            repr([(s["name"], s["description"]) for s in self.stores]).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        self._llm_cache: dict[str, tuple[float, Any]] = {}
+        self._result_cache: dict[str, tuple[float, List[AIDocument]]] = {}
+        # Keyword expansions in flight, so concurrent searches for the same query share one LLM call
+        self._pending_keywords: dict[str, asyncio.Future] = {}
 
 
         # Initialize LLM for filtering
-        self.llm = ChatOllama(model="llama3.2", temperature=0, num_ctx=120000)
+        self.llm = ChatOllama(model="llama3.2", temperature=0, num_ctx=SEARCH_LLM_NUM_CTX)
+        self.kw_llm = ChatOllama(
+            model="llama3.2", temperature=0, num_ctx=SEARCH_LLM_NUM_CTX, format='json', verbose=True
+        ).with_structured_output(AdditionalEmbeddingsAndKeywords)
 
         # Initialize LLMChainFilter
         self.llm_filter = LLMChainFilter.from_llm(self.llm)
         self.summarization_pipeline = None
         self.cuda_device = 0 if torch.cuda.is_available() else -1
         self.summarization_llm = None
+        # Concurrent searches summarize from worker threads; the pipeline shares one model and GPU
+        self._summarization_lock = threading.Lock()
         self.tokenizer = AutoTokenizer.from_pretrained("sshleifer/distilbart-cnn-6-6")
 
     def get_retrievers(self) -> list[ElasticVectorSearch]:
@@ -82,25 +209,132 @@ class MultiSourceSearcher:
         # return retrievers
 
 
-    async def select_stores(self, query: str) -> List[ElasticsearchStore]:
-        """Uses the LLM to select relevant data stores based on the query."""
+    def _cache_key(self, kind: str, query: str) -> str:
+        return hashlib.blake2b(f"{kind}\0{query.strip()}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def _cache_get(self, key: str, cache: Optional[dict] = None, ttl: float = LLM_CACHE_TTL_SECONDS):
+        entry = (self._llm_cache if cache is None else cache).get(key)
+        if entry is None or time.monotonic() - entry[0] > ttl:
+            return None
+        return entry[1]
+
+    def _cache_put(self, key: str, value, cache: Optional[dict] = None, max_entries: int = LLM_CACHE_MAX_ENTRIES) -> None:
+        cache = self._llm_cache if cache is None else cache
+        if len(cache) >= max_entries:
+            # Drop the oldest entry; dicts keep insertion order
+            del cache[next(iter(cache))]
+        cache[key] = (time.monotonic(), value)
+
+    def embed_phrases(self, phrases: List[str]) -> List[List[float]]:
+        """
+        Embeds phrases, computing only those not already cached. Duplicates are embedded once.
+
+        Args:
+            phrases (List[str]): Texts to embed.
+
+        Returns:
+            List[List[float]]: One vector per phrase, in the order given.
+        """
+        model = self.embeddings.model_name
+        keys = [(model, hashlib.blake2b(p.encode("utf-8"), digest_size=16).hexdigest()) for p in phrases]
+        vectors = {}
+        missing = {}
+        with _embedding_cache_lock:
+            for key, phrase in zip(keys, phrases):
+                if key in _embedding_cache:
+                    vectors[key] = _embedding_cache[key]
+                else:
+                    missing[key] = phrase
+        if missing:
+            # The model runs outside the lock so other searches can still read the cache
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            with _embedding_cache_lock:
+                for key, vector in zip(missing, computed):
+                    vectors[key] = vector
+                    if len(_embedding_cache) >= EMBEDDING_CACHE_MAX_ENTRIES:
+                        del _embedding_cache[next(iter(_embedding_cache))]
+                    _embedding_cache[key] = vector
+        return [vectors[key] for key in keys]
+
+    async def select_stores(self, query: str) -> List[dict]:
+        """Uses the LLM to select relevant data stores based on the query. Answers are cached per query."""
+        key = self._cache_key(f"select_stores:{self._stores_key}", query)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return list(cached)
+        candidates = [s for s in self.stores if "slab" not in s["name"].lower()]
+        decisions = await self._classify_stores_together(query, candidates)
+        if decisions is None:
+            decisions = await self._classify_stores_individually(query, candidates)
         selected_stores = []
-        for store_info in self.stores:
-            if("slab" in store_info["name"].lower()):
-                selected_stores.append(store_info["store"])
-                continue
-            response = self.llm.with_structured_output(AcceptRejectDataStore).invoke(
+        for store_info, decision in zip(candidates, decisions):
+            print(f"{decision} for {store_info['name']}", flush=True)
+            if decision:
+                selected_stores.append(store_info)
+        # Slab stores are always searched
+        selected_stores.extend(s for s in self.stores if "slab" in s["name"].lower())
+        self._cache_put(key, selected_stores)
+        return list(selected_stores)
+    
+    async def _classify_stores_together(self, query: str, candidates: List[dict]) -> Optional[List[bool]]:
+        """
+        Asks the LLM about all stores in one prompt.
+
+        Returns:
+            Optional[List[bool]]: One decision per candidate, or None if the answer does not line up with the stores.
+        """
+        store_list = "\n".join(
+            f"{i}. {store_info['name']}: {store_info['description']}"
+            for i, store_info in enumerate(candidates, start=1)
+        )
+        try:
+            result = await self.llm.with_structured_output(StoreSelections).ainvoke(
+                input=f"The following numbered list describes data stores, each holding a certain type of data.  Your job is to determine, for each one, if it would be useful to query this data domain to get documents to help solve the original query.\n\n"
+                  f"Data stores:\n{store_list}\n\nQuery: {query}\n\n"
+                  f"Reply only with a list of exactly {len(candidates)} 'true' or 'false' values in the decisions field, in the same order as the data stores. "
+                  "example: {'decisions': [true, false]}"
+            )
+        except Exception as e:
+            print(f"Combined store selection failed, asking per store: {e}", flush=True)
+            return None
+        if result is None or len(result.decisions) != len(candidates):
+            print("Combined store selection did not return one decision per store, asking per store", flush=True)
+            return None
+        return result.decisions
+
+    async def _classify_stores_individually(self, query: str, candidates: List[dict]) -> List[bool]:
+        """Asks the LLM about each store in its own prompt, all at once."""
+        chain = self.llm.with_structured_output(AcceptRejectDataStore)
+        responses = await asyncio.gather(*[
+            chain.ainvoke(
                 input=f"The following describes a data store for a certain type of data.  Your job is to determine if it would be useful to query this data domain to get documents to help solve the original query. "
                   f"Does the following document store contain documents that would help solve the query?\n\nDescription: {store_info['description']}\n\nQuery: {query}\n\n"
                   "Reply only with 'true' or 'false' in the response field example: {'response': true}"
             )
-            print(f"{response.response} for {store_info['name']}", flush=True)
-            if response.response:
-                selected_stores.append(store_info["store"])
-        return selected_stores
-    
+            for store_info in candidates
+        ])
+        return [response.response for response in responses]
+
     async def get_keywords_and_embeddings(self, query: str):
-        return ChatOllama(model="llama3.2", temperature=0, num_ctx=120000, format='json', verbose=True).with_structured_output(AdditionalEmbeddingsAndKeywords).invoke(
+        """
+        Asks the LLM for keywords and search phrases for the query. Answers are cached per query,
+        and concurrent calls for the same query share one request.
+        """
+        key = self._cache_key("keywords_and_embeddings", query)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        task = self._pending_keywords.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._ask_keywords_and_embeddings(query))
+            self._pending_keywords[key] = task
+            task.add_done_callback(lambda _: self._pending_keywords.pop(key, None))
+        result = await task
+        self._cache_put(key, result)
+        return result
+
+    async def _ask_keywords_and_embeddings(self, query: str):
+        return await self.kw_llm.ainvoke(
             input=f"""
 for the query that is meant to search across multiple data stores of 
 documents, emails, slack messages and jira tickets.  
@@ -134,100 +368,169 @@ Query to transform: {query}
         indexes: Annotated[Optional[List[str]], "List of specific vector store names to search"] = None,
         metadata_filter: Annotated[Optional[dict], "Metadata filters as key-value pairs"] = None,
         run_lm_reduction: Annotated[Optional[bool], "Whether to use ML reduction on the results"] = False,
+        fusion: Annotated[Literal["max", "rrf"], "How to combine the result lists of the query phrases"] = "max",
     ) -> List[AIDocument]:
         """
         Perform a multi-source search with keyword and embedding filters, optional date range, and LLM reduction.
 
+        Each query phrase yields its own result list per store. With fusion="max" a document keeps its best
+        similarity score across those lists; with fusion="rrf" its score is the Reciprocal Rank Fusion sum
+        over every list it appears in, so documents several phrases agree on rank higher.
+
+        Identical searches within SEARCH_RESULT_CACHE_TTL_SECONDS are answered from a cache. Every call
+        gets its own copies of the documents, so callers may rewrite their content.
+
         Returns:
             A list of `_AIDocument` objects representing the search results.
         """
-        # Build keyword query for Elasticsearch, if keywords are provided
-        keyword_filter = {
-            "bool": {
-                "should": [{"match": {"text": keyword}} for keyword in keywords],
-                "minimum_should_match": 1,
-            }
-        } if keywords else None
-
-        # Build date range filter for Elasticsearch, if dates are provided
-        date_filter = {
-            "range": {
-                "post_datetime": {
-                    "gte": from_date.isoformat() if from_date else None,
-                    "lte": to_date.isoformat() if to_date else None
+        result_key = self._cache_key("search", repr((
+            query, top_k, keywords, from_date, to_date, sorted(indexes or ()),
+            sorted((metadata_filter or {}).items()), run_lm_reduction, fusion,
+        )))
+        cached = self._cache_get(result_key, self._result_cache, SEARCH_RESULT_CACHE_TTL_SECONDS)
+        if cached is not None:
+            return [d.copy() for d in cached]
+
+        if not (keywords or from_date or to_date or metadata_filter):
+            # Most searches have no filters at all
+            es_filter = None
+        else:
+            filter_args = (
+                tuple(keywords or ()),
+                from_date,
+                to_date,
+                tuple(sorted((metadata_filter or {}).items())),
+            )
+            try:
+                es_filter = _build_es_filter(*filter_args)
+            except TypeError:
+                # Unhashable metadata values (e.g. lists) cannot be cached
+                es_filter = _build_es_filter.__wrapped__(*filter_args)
+
+        # The original query does not depend on the LLM, so embed it while the LLM requests run.
+        # The model and the Elasticsearch client are blocking, so run them off the event loop
+        embed_query = asyncio.to_thread(self.embed_phrases, [query])
+
+        # Use the LLM to generate additional keywords and embeddings, and to select stores if
+        # indexes are not explicitly provided; the two LLM requests run concurrently
+        if indexes:
+            additional, (query_vec,) = await asyncio.gather(
+                self.get_keywords_and_embeddings(query=query),
+                embed_query,
+            )
+            wanted = set(indexes)
+            selected_stores = [store for store in self.stores if store["name"] in wanted]
+        else:
+            additional, selected_stores, (query_vec,) = await asyncio.gather(
+                self.get_keywords_and_embeddings(query=query),
+                self.select_stores(query),
+                embed_query,
+            )
+
+        # Build one kNN search per (query embedding, store) and send them all in a single _msearch
+        searches = []
+        search_stores = []
+        # Embed every generated phrase in one batch; the model encodes them together instead of one at a time
+        qembs = await asyncio.to_thread(self.embed_phrases, additional.embeddings)
+        qembs.append(query_vec)
+        for qemb in qembs:
+            for store_info in selected_stores:
+                store:ElasticsearchStore = store_info["store"]
+                knn = {
+                    "field": store.vector_query_field,
+                    "query_vector": qemb,
+                    "k": top_k,
+                    "num_candidates": 10*top_k,
                 }
-            }
-        } if from_date or to_date else None
+                if es_filter:
+                    knn["filter"] = es_filter
+                searches.append((store._store.index, {
+                    "knn": knn,
+                    "size": top_k,
+                    "_source": [store.query_field, "metadata"],
+                }))
+                search_stores.append(store_info)
+        # Query embeddings are deterministic, so repeated questions can be answered from the shard request
+        # cache. Date ranges are usually computed from the current time and would only fill it with
+        # entries that are never hit again
+        hits_per_search = await asyncio.to_thread(
+            es_store.msearch, searches, request_cache=not (from_date or to_date)
+        )
 
+        # Gather the hits of every phrase per store so each store's documents are converted,
+        # and Slack messages extended, once rather than once per phrase
+        hits_by_store = {}
+        for store_info, hits in zip(search_stores, hits_per_search):
+            if fusion == "rrf":
+                hits = [{**hit, "_score": 1.0 / (RRF_K + rank)} for rank, hit in enumerate(hits, start=1)]
+            hits_by_store.setdefault(store_info["name"], (store_info, []))[1].extend(hits)
 
-        # Build metadata filter for Elasticsearch, if metadata_filter is provided
-        metadata_filter_query = {
-            "bool": {
-                "must": [{"match": {f"metadata.{key}": value}} for key, value in metadata_filter.items()]
-            }
-        } if metadata_filter else None
-
-        # Combine filters, if applicable
-        es_filter = {"bool": {"must": []}}
-        if keyword_filter:
-            es_filter["bool"]["must"].append(keyword_filter)
-        if date_filter:
-            es_filter["bool"]["must"].append(date_filter)
-        if metadata_filter_query:
-            es_filter["bool"]["must"].append(metadata_filter_query)
-        if not es_filter["bool"]["must"]:
-            es_filter = None  # Avoid adding empty filters
-
-        # Use the LLM to generate additional keywords and embeddings
-        additional = await self.get_keywords_and_embeddings(query=query)
-
-        # Select stores if indexes are not explicitly provided
-        selected_stores = [store for store in self.stores if store["name"] in indexes] if indexes else await self.select_stores(query)
-
-        # Create tasks for similarity and keyword searches across each selected store
         search_results = []
-        additional.embeddings.extend([query])  # Add the original query to embeddings
-        for q in additional.embeddings:
-            qemb = self.embeddings.embed_query(q)
-            for store_info in selected_stores:
-                store:ElasticsearchStore = store_info["store"]
-                temp_results = store.similarity_search_by_vector_with_relevance_scores(qemb, top_k, filter=es_filter, num_candidates=10*top_k)
-                    
-                temp_results_d = [d[0] for d in temp_results]
-                temp_results_s = [d[1] for d in temp_results]
-                docs = convert_documents_to_ai_documents(temp_results_d, store._store.index)
-                for i in range(len(docs)):
-                    docs[i].search_score = temp_results_s[i]
-                
-                if("slack" in store_info["name"]):
-                    docs = extend_slack_messages(docs)
-                #todo: change search_results from a tuple to just a docs list and filter on search_score
-                for i in range(len(docs)):
-                    search_results.append((
-                            docs[i], 
-                            list(filter(lambda d: d[0].metadata == docs[0]._document.metadata, temp_results))[0][1]
-                        ))
+        # Slack context lookups are Elasticsearch round trips. They are handed to the thread pool as
+        # soon as they are known, so they run while the remaining stores are converted; a task would
+        # not start until the loop below yields
+        loop = asyncio.get_running_loop()
+        slack_extensions = []
+        for store_info, hits in hits_by_store.values():
+            store:ElasticsearchStore = store_info["store"]
+            temp_results = _hits_to_docs_scores(hits, content_field=store.query_field)
+
+            docs = convert_documents_to_ai_documents([d[0] for d in temp_results], store._store.index)
+            for doc, (_, score) in zip(docs, temp_results):
+                doc.search_score = score
+            if fusion == "rrf":
+                docs = _sum_scores_by_id(docs)
+            
+            if("slack" in store_info["name"]):
+                # extend_slack_messages keeps the first message of each thread, so put the best scores first
+                docs.sort(key=attrgetter("search_score"), reverse=True)
+                # Run in a copy of the current context, as asyncio.to_thread does, so Prefect's run context
+                # (e.g. log_prints) still applies in the worker thread
+                slack_extensions.append(loop.run_in_executor(
+                    None, partial(contextvars.copy_context().run, extend_slack_messages, docs)
+                ))
+                continue
+            search_results.extend(docs)
+        for docs in await asyncio.gather(*slack_extensions):
+            search_results.extend(docs)
 
-        # Sort results by relevance score in descending order
-        search_results.sort(key=lambda x: x[1], reverse=True)
+        # Deduplicate results based on document ID, keeping the best scoring copy
+        best = {}
+        for doc in search_results:
+            current = best.get(doc.id)
+            if current is None or doc.search_score > current.search_score:
+                best[doc.id] = doc
 
-        # Deduplicate results based on document ID
-        combined_results = [d[0] for d in search_results]
-        combined_results = list({c.id: c for c in combined_results}.values())
+        # Sort results by relevance score in descending order
+        ranked = sorted(best.values(), key=attrgetter("search_score"), reverse=True)
+
+        # Collapse documents with identical text under different ids (e.g. the same Slack context
+        # reached from two messages), keeping the best scoring one so it does not take two slots
+        combined_results = []
+        seen_content = set()
+        for doc in ranked:
+            content_key = doc.page_content.strip()
+            if content_key not in seen_content:
+                seen_content.add(content_key)
+                combined_results.append(doc)
 
         # Apply reduction if requested
         docs = []
         if run_lm_reduction:
-            for d in combined_results:
-                d.set_page_content(self.summarize(d.page_content))
+            # Summarize every result in one batch instead of one model call per chunk
+            summaries = await asyncio.to_thread(self.summarize_many, [d.page_content for d in combined_results])
+            for d, summary in zip(combined_results, summaries):
+                d.set_page_content(summary)
                 docs.append(d)
                 # if len(docs) >= top_k:
                 #     break
         else:
             docs = combined_results #[:top_k]
 
+        # Cache copies; callers such as report summarizers rewrite the documents they are given
+        self._cache_put(result_key, [d.copy() for d in docs], self._result_cache, SEARCH_RESULT_CACHE_MAX_ENTRIES)
         # Return sorted filtered results
-        return docs
+        return list(docs)
 
 
     def search_boring_search(
@@ -286,26 +589,78 @@ Query to transform: {query}
         Returns:
             List[Dict[str, Any]]: List of documents matching the query.
         """
+        return self.search_indexes_by_username(
+            {index: size},
+            username=username,
+            from_date=from_date,
+            to_date=to_date,
+            metadata_filter=metadata_filter,
+        )[index]
 
-        selected_store = [store for store in self.stores if store["name"] == index][0]
+    def search_indexes_by_username(
+        self,
+        index_sizes: Dict[str, int],
+        username: Optional[str] = None,
+        from_date: Optional[datetime] = None,
+        to_date: Optional[datetime] = None,
+        metadata_filter: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, List[AIDocument]]:
+        """
+        Runs `search_by_username` against several indexes in a single _msearch request.
+
+        Args:
+            index_sizes (Dict[str, int]): Number of results to return for each index to search.
+            username (str, optional): The username to search for.
+            from_date (datetime, optional): Start date for the range filter. Defaults to None.
+            to_date (datetime, optional): End date for the range filter. Defaults to None.
+            metadata_filter (dict, optional): Metadata filters as key-value pairs. Defaults to None.
+
+        Returns:
+            Dict[str, List[AIDocument]]: The matching documents for each index.
+        """
+        searches = [
+            (index, self._build_username_search(index, username, from_date, to_date, metadata_filter, size).to_dict())
+            for index, size in index_sizes.items()
+        ]
+        results = {}
+        # The date ranges move with the clock, so these are not request-cached, but routing one user's
+        # searches to the same shard copies lets them share those nodes' filter caches.
+        # Hashed because a preference may not start with "_"
+        preference = hashlib.blake2b(username.encode("utf-8"), digest_size=8).hexdigest() if username else None
+        hits_per_search = es_store.msearch(searches, source_fields=HIT_SOURCE_FIELDS, preference=preference)
+        for (index, _), hits in zip(searches, hits_per_search):
+            # Parse and return the results
+            documents = [
+                Document(page_content=hit["_source"]["text"], metadata=hit["_source"]["metadata"], id=hit["_id"])
+                for hit in hits
+            ]
+            docs = convert_documents_to_ai_documents(documents, index)
+            if("slack" in index):
+                docs = extend_slack_messages(docs)
+            results[index] = docs
+        return results
+
+    def _build_username_search(
+        self,
+        index: str,
+        username: Optional[str],
+        from_date: Optional[datetime],
+        to_date: Optional[datetime],
+        metadata_filter: Optional[Dict[str, Any]],
+        size: int,
+    ) -> Search:
+        selected_store = self._stores_by_name[index]
         # Base search query
-        es = Elasticsearch("http://localhost:9200")
-        s = Search(using=es, index=selected_store["name"])
+        s = Search(index=selected_store["name"])
         if(username):
-            if(index=="email_messages"):
-                s = s.query("match", **{"metadata.from": username})
-            elif(index=="jira_issues"):
-                s = s.query("match", **{"metadata.assignee_displayName": username})
-            elif(index=="slack_messages"):
-                #TODO: add in a search for the user name in any slack mention
-                # Also todo, take the output contexts and merge so there are not a bunch of repeats.
-                s = s.query("match", **{"metadata.user": username})
-            elif(index=="slab_documents" or index=="slab_document_chunks"):
-                s = s.query("match", **{"metadata.owner": username})
-            elif(index=="bitbucket_pull_requests"):
-                s = s.query("match", **{"metadata.all_participants": username})
-            else:
+            #TODO: add in a search for the user name in any slack mention
+            # Also todo, take the output contexts and merge so there are not a bunch of repeats.
+            field = USERNAME_FIELDS.get(index)
+            if field is None:
                 raise Exception(f"user search not available for {index}")
+            # Results are sorted by date, so scores are never used; as a filter the clause skips
+            # scoring and can be served from the node query cache
+            s = s.filter("match", **{field: username})
 
 
         # Add date range filter
@@ -329,21 +684,10 @@ Query to transform: {query}
         # Sort by post_datetime ascending
         s = s.sort("post_datetime")
 
-        # Limit the number of results
-        s = s[:size]
-
+        # Limit the number of results; the total match count is never read
+        s = s[:size].extra(track_total_hits=False)
+        return s
 
-        # Execute the search
-        response = s.execute()
-        # Parse and return the results
-        results = [
-            Document(page_content=hit.text, metadata=dict(hit.metadata), id=hit.meta.id)
-            for hit in response
-        ]
-        docs = convert_documents_to_ai_documents(results, selected_store["name"])
-        if("slack" in index):
-            docs = extend_slack_messages(docs)
-        return docs
     def chunk_text(self,text, max_tokens=1000, overlap=100):
         tokens = self.tokenizer.encode(text)
         chunks = []
@@ -355,40 +699,60 @@ Query to transform: {query}
         return chunks
 
     def summarize(self, text):
-        if(len(text)<1024*3):
-            return text
-        if not self.summarization_pipeline:
-            self.summarization_pipeline = pipeline(
-                "summarization", 
-                model="sshleifer/distilbart-cnn-6-6",
-                device=self.cuda_device,  # This ensures the model runs on CPU
-                max_length=512,
-                min_length=30,
-            )
-            self.summarization_llm = HuggingFacePipeline(pipeline=self.summarization_pipeline)
-
-        try:        
-            chunks = self.chunk_text(text)
-            summaries = [self.summarization_llm.invoke(chunk) for chunk in chunks]
-            summary =  " ".join(summaries)
-
-            # summary = self.summarization_llm.invoke(text)
-        except torch.cuda.OutOfMemoryError:
-            print("Out of Memory! Clearing Cache...")
-            summary = text
-            # Release memory after summarization
-            del self.summarization_pipeline
-            del self.summarization_llm
-            torch.cuda.empty_cache()
-            self.summarization_pipeline = None
-            self.summarization_llm = None
-
-        return summary
+        return self.summarize_many([text])[0]
+
+    def summarize_many(self, texts: List[str]) -> List[str]:
+        """
+        Summarizes several texts, sending the chunks of all of them through the model as one batch.
+
+        Args:
+            texts (List[str]): Texts to summarize. Short texts are returned unchanged.
+
+        Returns:
+            List[str]: One summary per text, in the order given.
+        """
+        long_texts = [i for i, text in enumerate(texts) if len(text) >= 1024*3]
+        if not long_texts:
+            return list(texts)
+        with self._summarization_lock:
+            if not self.summarization_pipeline:
+                self.summarization_pipeline = pipeline(
+                    "summarization", 
+                    model="sshleifer/distilbart-cnn-6-6",
+                    device=self.cuda_device,  # This ensures the model runs on CPU
+                    max_length=512,
+                    min_length=30,
+                )
+                self.summarization_llm = HuggingFacePipeline(pipeline=self.summarization_pipeline)
+
+            summaries = list(texts)
+            try:        
+                chunks_per_text = [self.chunk_text(texts[i]) for i in long_texts]
+                chunk_summaries = self.summarization_llm.batch([c for chunks in chunks_per_text for c in chunks])
+                start = 0
+                for i, chunks in zip(long_texts, chunks_per_text):
+                    summaries[i] = " ".join(chunk_summaries[start:start + len(chunks)])
+                    start += len(chunks)
+
+                # summary = self.summarization_llm.invoke(text)
+            except torch.cuda.OutOfMemoryError:
+                print("Out of Memory! Clearing Cache...")
+                summaries = list(texts)
+                # Release memory after summarization
+                del self.summarization_pipeline
+                del self.summarization_llm
+                torch.cuda.empty_cache()
+                self.summarization_pipeline = None
+                self.summarization_llm = None
+
+        return summaries
 
 from datetime import datetime, timedelta
 from collections import defaultdict
-from elasticsearch import Elasticsearch
-from elasticsearch_dsl import Search
+import numpy as np
+
+# Slack context messages come back in posting order
+_SLACK_CONTEXT_SORT = ["metadata.ts"]
 
 def extend_slack_messages(
     slack_messages: list[AIDocument],
@@ -411,123 +775,101 @@ def extend_slack_messages(
         list[SlackMessageDocument]: The updated Slack message documents.
     """
 
-    # Deduplicate by thread_ts if present, otherwise by ts
+    # Deduplicate by thread_ts if present, otherwise by ts.
+    # Metadata is read once per message and carried along with it.
     dedup_map = {}
     for msg in slack_messages:
-        ts_thread = msg._get_metadata("thread_ts")
-        ts = msg._get_metadata("ts")
-        channel = msg._get_metadata("channel")
+        md = msg.metadata
+        ts_thread = md.get("thread_ts")
+        ts = md.get("ts")
+        channel = md.get("channel")
 
         if not channel or not ts:
             continue  # skip if missing crucial metadata
 
         key = (channel, ts_thread if ts_thread else ts)
         if key not in dedup_map:
-            dedup_map[key] = msg
+            dedup_map[key] = (msg, channel, ts, ts_thread)
         # If duplicate found, we ignore it since we only need one representative
 
-    unique_messages = list(dedup_map.values())
-
-    # Separate messages that have a thread_ts from those that do not
+    # Separate messages that have a thread_ts from those that do not.
+    # For thread messages, we just take them as is since each represents a unique thread
+    # and we have only one representative per thread.
+    # For non-thread messages, we merge overlapping intervals per channel.
     thread_messages = []
-    non_thread_messages = []
-    for msg in unique_messages:
-        if msg._get_metadata("thread_ts"):
+    non_thread_by_channel = defaultdict(list)
+    for msg, channel, ts, ts_thread in dedup_map.values():
+        if ts_thread:
             thread_messages.append(msg)
         else:
-            non_thread_messages.append(msg)
+            # Integer nanoseconds; datetimes are only built for the merged interval bounds
+            non_thread_by_channel[channel].append((int(float(ts) * 1e9), msg))
 
-    # For thread messages, we just take them as is since each represents a unique thread
-    # and we have only one representative per thread.
-
-    # For non-thread messages, we merge overlapping intervals per channel.
-    channel_time_intervals = defaultdict(list)
-    non_thread_data = []  # keep track of (channel, ts_datetime, msg) for interval assignment
-
-    for msg in non_thread_messages:
-        ts = float(msg._get_metadata("ts"))
-        channel = msg._get_metadata("channel")
-        if not channel:
-            continue
-        ts_datetime = datetime.utcfromtimestamp(ts)
-        from_time = ts_datetime - timedelta(minutes=minutes_before_after)
-        to_time = ts_datetime + timedelta(minutes=minutes_before_after)
-        channel_time_intervals[channel].append((from_time, to_time))
-        non_thread_data.append((channel, ts_datetime, msg))
-
-    # Merge overlapping intervals for each channel
-    for channel in channel_time_intervals:
-        intervals = channel_time_intervals[channel]
-        intervals.sort(key=lambda x: x[0])  # sort by start time
-        merged = []
-        current_start, current_end = intervals[0]
-
-        for i in range(1, len(intervals)):
-            start, end = intervals[i]
-            if start <= current_end:
-                # Overlapping interval
-                current_end = max(current_end, end)
-            else:
-                # No overlap, push the previous interval and move on
-                merged.append((current_start, current_end))
-                current_start, current_end = start, end
-        # Add the last interval
-        merged.append((current_start, current_end))
-        channel_time_intervals[channel] = merged
-
-    # Now we have merged intervals. For each merged interval, pick one representative message.
-    # We'll find which messages fall into each interval and choose the earliest by timestamp.
-    representative_non_thread_messages = []
-
-    # Map each interval to the messages that fall within it
-    for channel, ts_datetime, msg in non_thread_data:
-        for (start, end) in channel_time_intervals[channel]:
-            if start <= ts_datetime <= end:
-                representative_non_thread_messages.append((channel, start, end, ts_datetime, msg))
-                break
-
-    # Now we have a list of (channel, start, end, ts_datetime, msg).
-    # Group by (channel, start, end) to pick one representative
-    interval_groups = defaultdict(list)
-    for channel, start, end, ts_datetime, msg in representative_non_thread_messages:
-        interval_groups[(channel, start, end)].append((ts_datetime, msg))
-
-    # For each interval group, pick the earliest message
+    window = minutes_before_after * 60 * 1_000_000_000
     final_non_thread_representatives = []
-    for key, msg_list in interval_groups.items():
-        # Sort by ts_datetime to get the earliest message
-        msg_list.sort(key=lambda x: x[0])
-        earliest_msg = msg_list[0][1]  # earliest message by timestamp
-        # key = (channel, start, end)
-        start, end = key[1], key[2]
-        # We'll run _extend_slack_message on this earliest_msg using the interval times
-        final_non_thread_representatives.append((earliest_msg, start, end))
-
-    # Extend all representative messages now
+    for channel, entries in non_thread_by_channel.items():
+        ts_arr = np.array([e[0] for e in entries], dtype=np.int64)
+        earliest, starts, ends = _merge_time_windows(ts_arr, window)
+        for i, start, end in zip(earliest, starts, ends):
+            from_time = datetime.utcfromtimestamp(start / 1e9)
+            to_time = datetime.utcfromtimestamp(end / 1e9)
+            final_non_thread_representatives.append((entries[i][1], from_time, to_time))
+
+    # Extend all representative messages with a single _msearch: thread representatives
+    # fetch their whole thread, non-thread ones the merged interval around them
+    to_extend = [(msg, None, None) for msg in thread_messages] + final_non_thread_representatives
+    searches = [
+        ("slack_messages", _build_slack_context_query(msg, from_time, to_time))
+        for (msg, from_time, to_time) in to_extend
+    ]
     extended_messages = []
+    # Whole-thread lookups have no range filter and come back across searches and reports, so they can
+    # be served from the shard request cache. Time window lookups vary with every set of messages
+    hits_per_search = es_store.msearch(
+        searches, source_fields=HIT_SOURCE_FIELDS, request_cache=not final_non_thread_representatives
+    )
+    for (msg, _, _), hits in zip(to_extend, hits_per_search):
+        msg.set_page_content(_format_slack_context(hits))
+        extended_messages.append(msg)
 
-    # Extend thread representatives
-    for msg in thread_messages:
-        extended = _extend_slack_message(slack_message=msg, from_time=None, to_time=None)
-        extended_messages.append(extended)
+    return extended_messages
 
-    # Extend non-thread interval representatives
-    for (msg, from_time, to_time) in final_non_thread_representatives:
-        extended = _extend_slack_message(slack_message=msg, from_time=from_time, to_time=to_time)
-        extended_messages.append(extended)
 
-    return extended_messages
+def _merge_time_windows(ts_ns: np.ndarray, window_ns: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merges the overlapping [ts - window, ts + window] windows around a set of timestamps.
+
+    Every window has the same width, so sorting by timestamp also sorts by window start.
+    After sorting, a merged interval is a run of timestamps whose window starts before the
+    running maximum end of the windows before it; its first timestamp is the earliest.
 
+    Args:
+        ts_ns (np.ndarray): int64 timestamps in nanoseconds, in any order.
+        window_ns (int): Window size on either side of each timestamp, in nanoseconds.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: For each merged interval, the position in
+        `ts_ns` of its earliest timestamp, and its start and end in nanoseconds.
+    """
+    order = np.argsort(ts_ns, kind="stable")
+    starts = ts_ns[order] - window_ns
+    running_end = np.maximum.accumulate(ts_ns[order] + window_ns)
 
-def _extend_slack_message(
+    breaks = np.flatnonzero(starts[1:] > running_end[:-1]) + 1
+    first = np.concatenate(([0], breaks))
+    last = np.concatenate((breaks - 1, [len(order) - 1]))
+    return order[first], starts[first], running_end[last]
+
+
+def _build_slack_context_query(
     slack_message: AIDocument, 
     from_time: datetime = None, 
     to_time: datetime = None
-) -> AIDocument:
+) -> dict:
     """
-    Internal function to extend a Slack message by retrieving related context messages from the same channel.
-    If it's part of a thread, retrieves all messages from the thread.
-    If not, retrieves messages within the specified time range.
+    Internal function to build the search body that retrieves related context messages from the same channel.
+    If the message is part of a thread, the search matches all messages from the thread.
+    If not, it matches messages within the specified time range.
 
     Args:
         slack_message (SlackMessageDocument): The original Slack message document.
@@ -535,26 +877,24 @@ def _extend_slack_message(
         to_time (datetime): End of the time range (for non-thread messages).
 
     Returns:
-        SlackMessageDocument: The updated Slack message document with extended context.
+        dict: The search body for the slack_messages index.
     """
-    es_client = Elasticsearch(C.ES_URL)  # Initialize Elasticsearch client
-
-    ts = slack_message._get_metadata("ts")
-    ts_thread = slack_message._get_metadata("thread_ts")
-    channel = slack_message._get_metadata("channel")
+    md = slack_message.metadata
+    ts = md.get("ts")
+    ts_thread = md.get("thread_ts")
+    channel = md.get("channel")
 
     if not ts or not channel:
         raise ValueError("Missing 'ts' or 'channel' metadata in the Slack message document.")
 
+    # The body always has the same shape, so it is written out directly rather than
+    # built through elasticsearch_dsl objects for every message
     if ts_thread:
         # Retrieve entire thread
-        search_query = Search(using=es_client, index="slack_messages").query(
-            "bool",
-            must=[
-                {"term": {"metadata.channel.keyword": channel}},
-                {"term": {"metadata.thread_ts": str(ts_thread)}},
-            ],
-        ).sort("metadata.ts")
+        must = [
+            {"term": {"metadata.channel.keyword": channel}},
+            {"term": {"metadata.thread_ts": str(ts_thread)}},
+        ]
     else:
         # Use provided from_time and to_time
         if not from_time or not to_time:
@@ -563,28 +903,30 @@ def _extend_slack_message(
             from_time = ts_datetime - timedelta(minutes=120)
             to_time = ts_datetime + timedelta(minutes=120)
 
-        search_query = Search(using=es_client, index="slack_messages").query(
-            "bool",
-            must=[
-                {"term": {"metadata.channel.keyword": channel}},
-                {
-                    "range": {
-                        "metadata.ts_iso": {
-                            "gte": from_time,
-                            "lte": to_time,
-                        }
+        must = [
+            {"term": {"metadata.channel.keyword": channel}},
+            {
+                "range": {
+                    "metadata.ts_iso": {
+                        "gte": from_time,
+                        "lte": to_time,
                     }
-                },
-            ],
-        ).sort("metadata.ts")
+                }
+            },
+        ]
 
-    response = search_query.execute()
+    return {"query": {"bool": {"must": must}}, "sort": _SLACK_CONTEXT_SORT, "track_total_hits": False}
 
-    context_messages = [
-        f"[{datetime.fromtimestamp(float(msg.metadata['ts']))}] "
-        f"{msg.metadata['user'] if 'user' in msg.metadata else 'NoName'}: {msg.text}"
-        for msg in response.hits
-    ]
 
-    slack_message.set_page_content("\n".join(context_messages))
-    return slack_message
+def _format_slack_context(hits: list[dict]) -> str:
+    """Renders context message hits as one "[time] user: text" line per message."""
+    context_messages = []
+    for hit in hits:
+        source = hit["_source"]
+        metadata = source["metadata"]
+        context_messages.append(
+            f"[{datetime.fromtimestamp(float(metadata['ts']))}] "
+            f"{metadata['user'] if 'user' in metadata else 'NoName'}: {source['text']}"
+        )
+    return "\n".join(context_messages)
+
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from langchain.schema import Document
@@ -8,9 +9,12 @@ from langchain_elasticsearch import ElasticsearchStore
 from langchain_community.vectorstores import ElasticVectorSearch
 import os
 import prefect_data_getters.utilities.constants as C
+import prefect_data_getters.stores.elasticsearch as es_store
 
 # Constants
 EMB_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Documents per bulk request when writing embedded documents to Elasticsearch
+VECTOR_BULK_CHUNK_SIZE = 500
 
 # ============================
 #  Embeddings and Vector Store
@@ -38,38 +42,50 @@ def _get_vs(collection_name: C.VECTOR_STORE_NAMES) -> Chroma:
     )
 
 def get_embeddings(model_name=EMB_MODEL) -> HuggingFaceEmbeddings:
-    """Returns HuggingFace embeddings using the specified model."""
+    """Returns HuggingFace embeddings using the specified model, loaded once per process and shared by every store."""
+    # The cache is keyed on the model name, so get_embeddings() and get_embeddings(EMB_MODEL) share one model
+    return _load_embeddings(model_name)
+
+@lru_cache(maxsize=4)
+def _load_embeddings(model_name: str) -> HuggingFaceEmbeddings:
     return HuggingFaceEmbeddings(model_name=model_name)
 
 # ============================
 #  Batch Process and Store
 # ============================
-def batch_process_and_store(documents: list[Document],  vectorstore: Chroma, batch_size: int=1000):
-    """Processes documents in batches and adds them to the vector store."""
+def batch_process_and_store(documents: list[Document],  vectorstore: Chroma | C.VECTOR_STORE_NAMES, batch_size: int=1000):
+    """
+    Processes documents in batches and adds them to the vector store. Pass the store name rather
+    than a Chroma store where possible; only the name is used, and opening Chroma is not free.
+    """
+    index_name = vectorstore if isinstance(vectorstore, str) else vectorstore._collection_name
     documents = _deduplicate_based_on_id(documents)
-    ESVectorStore(vectorstore._collection_name).batch_process_and_store(documents=documents, batch_size=batch_size)
+    _get_es_vector_store(index_name).batch_process_and_store(documents=documents, batch_size=batch_size)
     # for i in range(0, len(documents), batch_size):
     #     batch = documents[i:i + batch_size]
     #     vectorstore.add_documents(batch)
 
 def _deduplicate_based_on_id(docs: list[Document]) -> list[Document]:
-    s = set()
-    ret_docs = []
-    for idx,d in enumerate(docs):
-        if(d.id != None):
-            if(d.id not in s):
-                s.add(d.id)
-                ret_docs.append(d)
-            else:
-                print(f"Duplicate document of {d.id} found")
-    return ret_docs
+    """Drops documents without an id and keeps the first document seen for each id."""
+    unique = {}
+    duplicates = []
+    for d in docs:
+        if d.id is None:
+            continue
+        if unique.setdefault(d.id, d) is not d:
+            duplicates.append(d.id)
+    if duplicates:
+        # One summary line rather than a print, and with log_prints a log record, per duplicate
+        print(f"Found {len(duplicates)} duplicate documents, e.g. {duplicates[:5]}")
+    return list(unique.values())
 
 
 
 class ESVectorStore():
     def __init__(self, index_name: C.VECTOR_STORE_NAMES):
+        self._index_name = index_name
         self._vector_store = ElasticsearchStore(
-            es_url=C.ES_URL,
+            es_connection=es_store.get_client(),
             index_name=index_name,
             embedding=get_embeddings(),
         )
@@ -77,7 +93,23 @@ class ESVectorStore():
         """Processes documents in batches and adds them to the vector store."""
         for i in range(0, len(documents), batch_size):
             batch = documents[i:i + batch_size]
-            self._vector_store.add_documents(batch)
+            # Refreshing after every batch makes each one wait on a new segment; refresh once below instead
+            self._vector_store.add_documents(
+                batch,
+                refresh_indices=False,
+                bulk_kwargs={"chunk_size": VECTOR_BULK_CHUNK_SIZE, "max_chunk_bytes": es_store.BULK_MAX_CHUNK_BYTES},
+            )
+        if documents:
+            es_store.get_client().indices.refresh(index=self._index_name)
+
+    def delete_by_ids(self, doc_ids) -> dict:
+        """Deletes embedded documents by id with a single bulk request against the vector index."""
+        return es_store.delete_documents(doc_ids, self._index_name)
 
     def getESStore(self) -> ElasticsearchStore:
-        return self._vector_store
\ No newline at end of file
+        return self._vector_store
+
+@lru_cache(maxsize=8)
+def _get_es_vector_store(index_name: C.VECTOR_STORE_NAMES) -> ESVectorStore:
+    """Returns a cached ESVectorStore per index so repeated batches reuse its client and embeddings."""
+    return ESVectorStore(index_name)
@@ -0,0 +1,48 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+import copy
+import pickle
+
+from langchain_core.documents import Document
+
+from prefect_data_getters.stores.documents import SlabChunkDocument, SlackMessageDocument
+
+
+class TestSlabChunkDocument(unittest.TestCase):
+    def chunk(self, text, document_id="doc-1"):
+        return SlabChunkDocument(Document(page_content=text, metadata={"document_id": document_id}))
+
+    def test_id_is_stable_for_identical_chunks(self):
+        self.assertEqual(self.chunk("hello").id, self.chunk("hello").id)
+
+    def test_id_differs_by_content_and_parent(self):
+        self.assertNotEqual(self.chunk("hello").id, self.chunk("world").id)
+        self.assertNotEqual(self.chunk("hello").id, self.chunk("hello", "doc-2").id)
+
+    def test_id_prefixed_with_parent_document(self):
+        self.assertTrue(self.chunk("hello").id.startswith("doc-1_"))
+
+
+class TestDocumentCopies(unittest.TestCase):
+    def test_pickle_and_deepcopy_without_metadata(self):
+        doc = SlackMessageDocument(Document(page_content="hi"))
+        for copied in (pickle.loads(pickle.dumps(doc)), copy.deepcopy(doc)):
+            self.assertEqual(copied.id, doc.id)
+            self.assertEqual(copied.metadata, {})
+
+    def test_copy_is_independent(self):
+        doc = SlabChunkDocument(Document(page_content="hello", metadata={"document_id": "doc-1"}))
+        doc.search_score = 0.75
+        copied = doc.copy()
+        copied.set_page_content("summary")
+        self.assertEqual(doc.page_content, "hello")
+        self.assertNotIn("summary", str(doc))
+        self.assertEqual((copied.id, copied.search_score), (doc.id, 0.75))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+from langchain_core.documents import Document
+
+from prefect_data_getters.stores.documents import SlackMessageDocument
+from prefect_data_getters.stores.rag_man import (
+    MultiSourceSearcher,
+    _build_es_filter,
+    _merge_time_windows,
+    _sum_scores_by_id,
+)
+
+
+class TestBuildUsernameSearch(unittest.TestCase):
+    def build(self, index, username, from_date=None, metadata_filter=None):
+        # Building the query only needs the store lookup, not a connected searcher
+        searcher = SimpleNamespace(_stores_by_name={index: {"name": index}})
+        return MultiSourceSearcher._build_username_search(
+            searcher, index, username, from_date, None, metadata_filter, 5
+        ).to_dict()
+
+    def test_username_and_dates_are_filters(self):
+        body = self.build("slack_messages", "alice", datetime(2024, 1, 1), {"channel": "general"})
+        self.assertEqual(body["query"]["bool"]["filter"], [
+            {"match": {"metadata.user": "alice"}},
+            {"range": {"metadata.ts_iso": {"gte": "2024-01-01T00:00:00"}}},
+            {"term": {"metadata.channel": "general"}},
+        ])
+        self.assertEqual(body["sort"], ["post_datetime"])
+        self.assertEqual((body["size"], body["track_total_hits"]), (5, False))
+
+    def test_without_username(self):
+        self.assertNotIn("query", self.build("jira_issues", None))
+
+    def test_unknown_username_index(self):
+        with self.assertRaises(Exception):
+            self.build("google_calendar_events", "alice")
+
+
+class TestMergeTimeWindows(unittest.TestCase):
+    def merge(self, ts, window):
+        first, starts, ends = _merge_time_windows(np.array(ts, dtype=np.int64), window)
+        return first.tolist(), starts.tolist(), ends.tolist()
+
+    def test_single_timestamp(self):
+        self.assertEqual(self.merge([100], 10), ([0], [90], [110]))
+
+    def test_disjoint_windows(self):
+        self.assertEqual(self.merge([0, 100], 10), ([0, 1], [-10, 90], [10, 110]))
+
+    def test_touching_windows_merge(self):
+        # The first window ends exactly where the second starts
+        self.assertEqual(self.merge([0, 20], 10), ([0], [-10], [30]))
+
+    def test_windows_one_apart_stay_separate(self):
+        self.assertEqual(self.merge([0, 21], 10), ([0, 1], [-10, 11], [10, 31]))
+
+    def test_tied_timestamps_keep_first_position(self):
+        self.assertEqual(self.merge([50, 50, 50], 10), ([0], [40], [60]))
+
+    def test_unsorted_input_reports_original_positions(self):
+        first, starts, ends = self.merge([100, 0, 5, 200, 95], 10)
+        self.assertEqual(first, [1, 4, 3])
+        self.assertEqual(starts, [-10, 85, 190])
+        self.assertEqual(ends, [15, 110, 210])
+
+    def test_chained_windows_merge(self):
+        # Each window only overlaps its neighbours, but the run merges into one interval
+        self.assertEqual(self.merge([30, 0, 15, 45], 10), ([1], [-10], [55]))
+
+
+class TestBuildEsFilter(unittest.TestCase):
+    def test_no_filters(self):
+        self.assertIsNone(_build_es_filter((), None, None, ()))
+
+    def test_clause_order(self):
+        es_filter = _build_es_filter(
+            ("deploy",), datetime(2024, 1, 1), None, (("channel", "general"),)
+        )
+        must = es_filter["bool"]["must"]
+        self.assertEqual(must[0], {"bool": {"must": [{"match": {"metadata.channel": "general"}}]}})
+        self.assertEqual(must[1], {"range": {"post_datetime": {"gte": "2024-01-01T00:00:00", "lte": None}}})
+        self.assertEqual(
+            must[2], {"bool": {"should": [{"match": {"text": "deploy"}}], "minimum_should_match": 1}}
+        )
+
+    def test_cached(self):
+        args = (("a", "b"), None, datetime(2024, 1, 1), ())
+        self.assertIs(_build_es_filter(*args), _build_es_filter(*args))
+
+
+class TestSumScoresById(unittest.TestCase):
+    def slack(self, ts, score):
+        doc = SlackMessageDocument(Document(page_content=ts, metadata={"channel": "c", "ts": ts}))
+        doc.search_score = score
+        return doc
+
+    def test_sums_duplicates_into_first_seen(self):
+        first = self.slack("1", 0.5)
+        fused = _sum_scores_by_id([first, self.slack("2", 0.25), self.slack("1", 1.0)])
+        self.assertEqual([d.id for d in fused], ["c_1", "c_2"])
+        self.assertIs(fused[0], first)
+        self.assertEqual(fused[0].search_score, 1.5)
+        self.assertEqual(fused[1].search_score, 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,17 +4,17 @@ import asyncio
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
-import unittest
 
 from datetime import datetime
 from prefect_data_getters.stores.documents import SlackMessageDocument
 
-from prefect_data_getters.stores.rag_man import MultiSourceSearcher, extend_slack_message
+from prefect_data_getters.stores.rag_man import MultiSourceSearcher
 import  prefect_data_getters.utilities.constants as C
 class TestExample(unittest.TestCase):
-    def setUp(self):
-        """Set up the test environment."""
-        self.ms = MultiSourceSearcher()
+    @classmethod
+    def setUpClass(cls):
+        """Set up the test environment once; the searcher is only read by the tests."""
+        cls.ms = MultiSourceSearcher()
     def test_sample(self):
         async def atest():   
             docs = await self.ms.search(
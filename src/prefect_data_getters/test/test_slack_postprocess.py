@@ -0,0 +1,24 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from prefect_data_getters.exporters.slack.slack_postprocess import replace_user_mentions
+
+
+class TestReplaceUserMentions(unittest.TestCase):
+    user_map = {"U1": "alice", "U2": "bob"}
+
+    def test_replaces_known_users(self):
+        self.assertEqual(replace_user_mentions("hi <@U1> and <@U2>", self.user_map), "hi alice and bob")
+
+    def test_leaves_unknown_users(self):
+        self.assertEqual(replace_user_mentions("ping <@U9>", self.user_map), "ping <@U9>")
+
+    def test_without_mentions(self):
+        self.assertEqual(replace_user_mentions("a < b", self.user_map), "a < b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from unittest import mock
+
+from langchain_core.documents import Document
+
+from prefect_data_getters.stores import vectorstore
+from prefect_data_getters.stores.vectorstore import _deduplicate_based_on_id
+
+
+class TestDeduplicateBasedOnId(unittest.TestCase):
+    def test_keeps_first_document_per_id(self):
+        docs = [
+            Document(page_content="a", id="1"),
+            Document(page_content="b", id="2"),
+            Document(page_content="c", id="1"),
+        ]
+        self.assertEqual([d.page_content for d in _deduplicate_based_on_id(docs)], ["a", "b"])
+
+    def test_drops_documents_without_id(self):
+        docs = [Document(page_content="a"), Document(page_content="b", id="2")]
+        self.assertEqual([d.id for d in _deduplicate_based_on_id(docs)], ["2"])
+
+
+class TestGetEmbeddings(unittest.TestCase):
+    def test_default_and_explicit_model_share_one_instance(self):
+        vectorstore._load_embeddings.cache_clear()
+        with mock.patch.object(vectorstore, "HuggingFaceEmbeddings", side_effect=lambda **kw: object()) as load:
+            default = vectorstore.get_embeddings()
+            self.assertIs(vectorstore.get_embeddings(vectorstore.EMB_MODEL), default)
+            self.assertIs(vectorstore.get_embeddings(model_name=vectorstore.EMB_MODEL), default)
+            self.assertEqual(load.call_count, 1)
+        vectorstore._load_embeddings.cache_clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
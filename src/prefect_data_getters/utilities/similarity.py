@@ -30,7 +30,7 @@ def calculate_similarity(strings, target):
     results = []
     for string, score in zip(strings, similarities.tolist()):
         results.append({'value': string, 'similarity_score': score})
-        logger.debug(f'String: {string}, Similarity Score: {score:.2f}')
+        logger.debug('String: %s, Similarity Score: %.2f', string, score)
 
     # Sort results by similarity score in descending order
     results.sort(key=lambda x: x['similarity_score'], reverse=True)